@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+import uuid
+from typing import Any, Callable, Union
+
+import kachery_p2p as kp
+import numpy as np
+from ._lru_cache import LRUCache, _mmap_nominal_num_bytes
+
+# In-process cache of loaded objects, shared by the Surface and VectorField3D loaders.
+# Keys are kachery URIs (content hashes), so entries never go stale.
+# Note: hither may run each job in its own process, in which case this cache only lasts
+# for the duration of a job. Derived data that is expensive to compute (LOD meshes,
+# triangle buffers, BVHs, resampled fields) therefore goes through _cached(), which
+# also keeps it in an on-disk cache shared by all worker processes.
+load_cache = LRUCache(max_bytes=int(os.getenv('SURFACEVIEW2_LOAD_CACHE_MB', '1024')) * 1024 * 1024)
+# Memory-mapped .npy files are kept separately, so that they do not compete with the in-memory
+# objects for the byte budget; each is charged a nominal size, which bounds the number of open maps.
+mmap_cache = LRUCache(max_bytes=int(os.getenv('SURFACEVIEW2_MMAP_CACHE_ITEMS', '512')) * _mmap_nominal_num_bytes)
+
+disk_cache_dir = os.getenv('SURFACEVIEW2_DISK_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.surfaceview2', 'cache'))
+disk_cache_max_bytes = int(os.getenv('SURFACEVIEW2_DISK_CACHE_MB', '4096')) * 1024 * 1024
+
+def _object_key(x: Any) -> str:
+    # content hash of a JSON-serializable descriptor
+    return hashlib.sha1(json.dumps(x, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _store_npy(x: np.ndarray) -> str:
+    uri = kp.store_npy(np.ascontiguousarray(x))
+    if uri is None:
+        raise Exception('Unable to store npy array')
+    return uri
+
+def _load_npy_mmap(uri: str) -> np.ndarray:
+    # memory-map the locally stored .npy file so that worker processes share pages through the OS cache
+    key = f'npy:{uri}'
+    x = mmap_cache.get(key)
+    if x is not None:
+        return x
+    path = kp.load_file(uri)
+    if path is None:
+        raise Exception(f'Unable to load: {uri}')
+    x = np.load(path, mmap_mode='r')
+    mmap_cache.set(key, x)
+    return x
+
+def _load_json(uri: str) -> Any:
+    key = f'json:{uri}'
+    x = load_cache.get(key)
+    if x is not None:
+        return x
+    x = kp.load_json(uri)
+    if x is None:
+        raise Exception(f'Unable to load: {uri}')
+    load_cache.set(key, x)
+    return x
+
+def _load_pkl(uri: str) -> Any:
+    key = f'pkl:{uri}'
+    x = load_cache.get(key)
+    if x is not None:
+        return x
+    x = kp.load_pkl(uri)
+    if x is None:
+        raise Exception(f'Unable to load: {uri}')
+    load_cache.set(key, x)
+    return x
+
+
+def _cached(key: str, compute: Callable[[], Any]) -> Any:
+    # derived data, looked up in load_cache, then in the on-disk cache, then computed
+    x = load_cache.get(key)
+    if x is not None:
+        return x
+    x = _disk_cache_get(key)
+    if x is None:
+        x = compute()
+        _disk_cache_set(key, x)
+    load_cache.set(key, x)
+    return x
+
+def _disk_cache_path(key: str) -> str:
+    h = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(disk_cache_dir, h[0:2], f'{h}.pkl')
+
+def _disk_cache_get(key: str) -> Union[Any, None]:
+    path = _disk_cache_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            x = pickle.load(f)
+    except Exception as e:
+        print(f'WARNING: Problem reading from disk cache: {path}', e)
+        return None
+    try:
+        os.utime(path) # mark as recently used
+    except Exception:
+        pass
+    return x
+
+def _disk_cache_set(key: str, x: Any):
+    path = _disk_cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write to a temporary file and rename, so that other processes never see a partial file
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(x, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f'WARNING: Problem writing to disk cache: {path}', e)
+        return
+    _prune_disk_cache()
+
+def disk_cache_stats() -> dict:
+    # the on-disk cache is shared by all worker processes, so these can be reported from any process
+    files = _disk_cache_files()
+    return {
+        'maxBytes': disk_cache_max_bytes,
+        'numBytes': sum([f[1] for f in files]),
+        'numItems': len(files)
+    }
+
+def _disk_cache_files():
+    # (mtime, size, path) of the cache files, not including recent temporary files
+    files = []
+    for dirpath, _, filenames in os.walk(disk_cache_dir):
+        for fname in filenames:
+            p = os.path.join(dirpath, fname)
+            try:
+                st = os.stat(p)
+            except FileNotFoundError:
+                continue
+            if fname.endswith('.tmp') and time.time() - st.st_mtime < 60 * 60:
+                continue # may still be being written
+            files.append((st.st_mtime, st.st_size, p))
+    return files
+
+def _prune_disk_cache():
+    # remove the least recently used files beyond disk_cache_max_bytes
+    files = _disk_cache_files()
+    total = sum([f[1] for f in files])
+    for _, size, p in sorted(files):
+        if total <= disk_cache_max_bytes:
+            break
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+        total = total - size
@@ -0,0 +1,47 @@
+import json
+import time
+from typing import Any, List
+
+import numpy as np
+from surfaceview2.backend._serialize import _serialize, _serialize_json_bytes
+
+# Micro-benchmarks of result/message encoding: the previous path (_serialize, then
+# json.dumps once to measure the size and once more to send) vs _serialize_json_bytes.
+#   python -m surfaceview2._devel.benchmark_serialize
+
+def main():
+    payloads = [
+        ('deep dict', _deep_dict(depth=6, breadth=6)),
+        ('status messages', [{'type': 'taskStatusUpdate', 'taskHash': f'{i:040x}', 'status': 'running'} for i in range(2000)]),
+        ('large array', {'vertices': np.random.rand(1000000, 3).astype(np.float32), 'faces': np.arange(3000000, dtype=np.int32)}),
+        ('many small arrays', [{'values': np.random.rand(16).astype(np.float32), 'index': np.int64(i)} for i in range(10000)])
+    ]
+    print(f'{"payload":<20} {"size (KB)":>10} {"previous (ms)":>14} {"single pass (ms)":>17} {"speedup":>8}')
+    for name, x in payloads:
+        def previous():
+            y = _serialize(x)
+            size = len(json.dumps(y))
+            return json.dumps(y).encode('utf-8'), size
+        def single_pass():
+            ret = _serialize_json_bytes(x)
+            return ret, len(ret)
+        (a, size), t_previous = _time_best(previous)
+        (b, _), t_single_pass = _time_best(single_pass)
+        assert a == b
+        print(f'{name:<20} {size / 1024:>10.1f} {t_previous * 1000:>14.1f} {t_single_pass * 1000:>17.1f} {t_previous / t_single_pass:>8.2f}')
+
+def _deep_dict(depth: int, breadth: int) -> Any:
+    if depth == 0:
+        return [1, 2.5, 'leaf', None, True]
+    return {f'key{i}': _deep_dict(depth - 1, breadth) for i in range(breadth)}
+
+def _time_best(f, num_repeats: int=5):
+    times: List[float] = []
+    for _ in range(num_repeats):
+        timer = time.time()
+        ret = f()
+        times.append(time.time() - timer)
+    return ret, min(times)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import time
+import zlib
+from typing import Any, List
+
+import kachery_p2p as kp
+import numpy as np
+import surfaceview2
+from surfaceview2.backend._binary_result import _encode_binary_result
+from surfaceview2.backend._serialize import _serialize
+from surfaceview2.tasks._slice_encoding import _encode_slice_values
+
+# Size and latency of the upload compression settings (see backend/_compression.py)
+# on real payloads. Example:
+#   python -m surfaceview2._devel.benchmark_upload_compression --surface-uri sha1://... --vector-field-uri sha1://... --subfeed-uri feed://.../~...
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--surface-uri', default=None)
+    parser.add_argument('--vector-field-uri', default=None)
+    parser.add_argument('--subfeed-uri', default=None)
+    parser.add_argument('--num-repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = []
+    if args.surface_uri is not None:
+        S = surfaceview2.Surface(args.surface_uri)
+        x = {
+            'vertices': S.vertices.astype(np.float32, copy=False),
+            'faces': S.faces.astype(np.int32, copy=False),
+            'ifaces': S.ifaces.astype(np.int32, copy=False)
+        }
+        payloads.append(('surface (binary)', _binary_bytes(x)))
+        payloads.append(('surface (json)', _json_bytes(_serialize(x))))
+    if args.vector_field_uri is not None:
+        V = surfaceview2.VectorField3D(args.vector_field_uri)
+        a = V.get_slice('XY', V.nz // 2)
+        for precision in ['float32', 'uint8']:
+            x = _encode_slice_values(a, components=None, quantity='complex', precision=precision)
+            payloads.append((f'slice {precision} (binary)', _binary_bytes(x)))
+            payloads.append((f'slice {precision} (json)', _json_bytes(_serialize(x))))
+    if args.subfeed_uri is not None:
+        sf = kp.load_subfeed(args.subfeed_uri)
+        messages = []
+        while True:
+            msg = sf.get_next_message(wait_msec=0, signed=True)
+            if msg is None: break
+            messages.append(msg)
+        if len(messages) > 0:
+            payloads.append(('subfeed message', _json_bytes(messages[-1])))
+            payloads.append(('subfeed segment', _json_bytes(messages)))
+    if len(payloads) == 0:
+        raise Exception('No payloads. Specify at least one of --surface-uri, --vector-field-uri, --subfeed-uri')
+
+    settings = [('gzip', 1), ('gzip', 6), ('gzip', 9)]
+    try:
+        import zstandard
+        settings.extend([('zstd', 1), ('zstd', 3), ('zstd', 19)])
+    except ImportError:
+        print('zstandard is not installed; skipping zstd')
+
+    print(f'{"payload":<28} {"method":<8} {"size (KB)":>10} {"ratio":>6} {"compress (ms)":>14} {"decompress (ms)":>16}')
+    for name, data in payloads:
+        print(f'{name:<28} {"none":<8} {len(data) / 1024:>10.1f} {1:>6.2f} {0:>14.1f} {0:>16.1f}')
+        for method, level in settings:
+            compressed, t_compress = _time_best(lambda: _compress(data, method, level), args.num_repeats)
+            _, t_decompress = _time_best(lambda: _decompress(compressed, method), args.num_repeats)
+            print(f'{name:<28} {method + ":" + str(level):<8} {len(compressed) / 1024:>10.1f} {len(data) / len(compressed):>6.2f} {t_compress * 1000:>14.1f} {t_decompress * 1000:>16.1f}')
+
+def _binary_bytes(x: Any) -> bytes:
+    chunks, _ = _encode_binary_result(x)
+    return b''.join(chunks)
+
+def _json_bytes(x: Any) -> bytes:
+    return json.dumps(x).encode('utf-8')
+
+def _compress(data: bytes, method: str, level: int) -> bytes:
+    if method == 'gzip':
+        c = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return c.compress(data) + c.flush()
+    else:
+        import zstandard
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+def _decompress(data: bytes, method: str) -> bytes:
+    if method == 'gzip':
+        return zlib.decompress(data, 47)
+    else:
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+def _time_best(f, num_repeats: int):
+    times: List[float] = []
+    for _ in range(num_repeats):
+        timer = time.time()
+        ret = f()
+        times.append(time.time() - timer)
+    return ret, min(times)
+
+if __name__ == '__main__':
+    main()
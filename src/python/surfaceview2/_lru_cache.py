@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Union
+
+import numpy as np
+
+
+class LRUCache:
+    def __init__(self, *, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._items: 'OrderedDict[str, Any]' = OrderedDict()
+        self._sizes: dict = {}
+        self._num_bytes = 0
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_evictions = 0
+        self._num_bytes_evicted = 0
+        self._lock = threading.Lock()
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+    def set_max_bytes(self, max_bytes: int):
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict()
+    def get(self, key: str) -> Union[Any, None]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._num_hits = self._num_hits + 1
+                return self._items[key]
+            self._num_misses = self._num_misses + 1
+            return None
+    def set(self, key: str, value: Any):
+        size = _estimate_num_bytes(value)
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            if size > self._max_bytes:
+                # never cache items that would evict everything else
+                return
+            self._items[key] = value
+            self._sizes[key] = size
+            self._num_bytes = self._num_bytes + size
+            self._evict()
+    def clear(self):
+        with self._lock:
+            for key in list(self._items.keys()):
+                self._remove(key)
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'maxBytes': self._max_bytes,
+                'numBytes': self._num_bytes,
+                'numItems': len(self._items),
+                'numHits': self._num_hits,
+                'numMisses': self._num_misses,
+                'numEvictions': self._num_evictions,
+                'numBytesEvicted': self._num_bytes_evicted
+            }
+    def _evict(self):
+        while self._num_bytes > self._max_bytes and len(self._items) > 0:
+            key = next(iter(self._items))
+            self._num_evictions = self._num_evictions + 1
+            self._num_bytes_evicted = self._num_bytes_evicted + self._sizes[key]
+            self._remove(key)
+    def _remove(self, key: str):
+        del self._items[key]
+        self._num_bytes = self._num_bytes - self._sizes[key]
+        del self._sizes[key]
+
+# memory-mapped arrays are not resident (pages are loaded and dropped by the OS as needed),
+# so they are charged a nominal size and do not evict in-memory items
+_mmap_nominal_num_bytes = 4096
+
+def _estimate_num_bytes(x: Any) -> int:
+    if isinstance(x, np.memmap):
+        return _mmap_nominal_num_bytes
+    elif isinstance(x, np.ndarray):
+        return int(x.nbytes)
+    elif isinstance(x, dict):
+        return 64 + sum([_estimate_num_bytes(k) + _estimate_num_bytes(v) for k, v in x.items()])
+    elif isinstance(x, (list, tuple)):
+        return 64 + sum([_estimate_num_bytes(v) for v in x])
+    elif isinstance(x, (str, bytes)):
+        return 48 + len(x)
+    elif hasattr(x, 'nbytes'):
+        return int(x.nbytes)
+    else:
+        return 32
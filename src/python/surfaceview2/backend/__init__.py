@@ -1 +1,2 @@
-from .taskfunction import taskfunction
\ No newline at end of file
+from .taskfunction import taskfunction
+from ._compression import set_upload_compression
\ No newline at end of file
@@ -0,0 +1,92 @@
+import json
+import struct
+from typing import Any, List, Tuple, Union
+
+import numpy as np
+
+# Binary result container
+#   magic (8 bytes) | header length (uint32 little endian) | header (utf-8 JSON) | padding | buffers
+# The header is the result tree with each ndarray replaced by
+#   {'_type': 'ndarray_ref', 'shape': [...], 'dtype': '...', 'offset': ..., 'nbytes': ...}
+# where offset is relative to the start of the buffer section. The buffer section and
+# every buffer start on an 8-byte boundary, and arrays are stored little endian in C order.
+
+_MAGIC = b'SV2BIN01'
+_ALIGNMENT = 8
+
+def _encode_binary_result(x: Any) -> Tuple[List[Union[bytes, memoryview]], int]:
+    # returns a list of chunks to be written in order (array data is not copied) and the total size
+    buffers: List[memoryview] = []
+    position = [0]
+    def add_buffer(a: np.ndarray) -> dict:
+        if a.dtype.byteorder == '>' or (a.dtype.byteorder == '=' and not _little_endian_host()):
+            a = a.astype(a.dtype.newbyteorder('<'))
+        a = np.require(a, requirements='C') # unlike ascontiguousarray, keeps 0-d arrays 0-d
+        offset = _aligned(position[0])
+        if offset > position[0]:
+            buffers.append(memoryview(bytes(offset - position[0])))
+        mv = memoryview(a).cast('B') if a.nbytes > 0 else memoryview(b'')
+        buffers.append(mv)
+        position[0] = offset + a.nbytes
+        return {
+            '_type': 'ndarray_ref',
+            'shape': [int(s) for s in a.shape],
+            'dtype': str(a.dtype.newbyteorder('=')),
+            'offset': offset,
+            'nbytes': int(a.nbytes)
+        }
+    header = _replace_arrays(x, add_buffer)
+    header_bytes = json.dumps(header).encode('utf-8')
+    prefix_size = len(_MAGIC) + 4 + len(header_bytes)
+    padding = _aligned(prefix_size) - prefix_size
+    chunks: List[Union[bytes, memoryview]] = [_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + bytes(padding)]
+    chunks.extend(buffers)
+    return chunks, prefix_size + padding + position[0]
+
+def _decode_binary_result(buf: Union[bytes, memoryview]) -> Any:
+    # reference decoder; arrays are zero-copy views into buf
+    buf = memoryview(buf)
+    if bytes(buf[:len(_MAGIC)]) != _MAGIC:
+        raise Exception('Not a binary result')
+    header_length = struct.unpack('<I', buf[len(_MAGIC):len(_MAGIC) + 4])[0]
+    header_end = len(_MAGIC) + 4 + header_length
+    header = json.loads(bytes(buf[len(_MAGIC) + 4:header_end]).decode('utf-8'))
+    data_start = _aligned(header_end)
+    def restore(x):
+        if isinstance(x, dict):
+            if x.get('_type', None) == 'ndarray_ref':
+                start = data_start + x['offset']
+                a = np.frombuffer(buf[start:start + x['nbytes']], dtype=np.dtype(x['dtype']).newbyteorder('<'))
+                return a.reshape(x['shape'])
+            return {k: restore(v) for k, v in x.items()}
+        elif isinstance(x, list):
+            return [restore(v) for v in x]
+        return x
+    return restore(header)
+
+def _is_binary_result(buf: Union[bytes, memoryview]) -> bool:
+    return bytes(memoryview(buf)[:len(_MAGIC)]) == _MAGIC
+
+def _replace_arrays(x: Any, add_buffer) -> Any:
+    if isinstance(x, np.ndarray):
+        return add_buffer(x)
+    elif isinstance(x, np.integer):
+        return int(x)
+    elif isinstance(x, np.floating):
+        return float(x)
+    elif isinstance(x, np.bool_):
+        return bool(x)
+    elif isinstance(x, dict):
+        return {key: _replace_arrays(val, add_buffer) for key, val in x.items()}
+    elif isinstance(x, (list, tuple)):
+        return [_replace_arrays(val, add_buffer) for val in x]
+    elif (x is None) or isinstance(x, (str, bool, int, float)):
+        return x
+    raise Exception(f'Item is not json safe: {type(x)}')
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+def _little_endian_host() -> bool:
+    import sys
+    return sys.byteorder == 'little'
@@ -0,0 +1,50 @@
+import bisect
+import io
+from typing import List, Union
+
+class _ChunksReader(io.RawIOBase):
+    # read-only, seekable file object over a list of byte chunks, copying only into the caller's buffer
+    # (resumable uploads call tell() at the start and seek back to the last confirmed byte on retry)
+    def __init__(self, chunks: List[Union[bytes, memoryview]]):
+        self._chunks = [memoryview(c).cast('B') for c in chunks]
+        self._chunks = [c for c in self._chunks if len(c) > 0]
+        # absolute offset of the start of each chunk
+        self._starts: List[int] = []
+        size = 0
+        for c in self._chunks:
+            self._starts.append(size)
+            size = size + len(c)
+        self._size = size
+        self._position = 0
+    def readable(self):
+        return True
+    def seekable(self):
+        return True
+    def tell(self):
+        return self._position
+    def seek(self, offset: int, whence: int=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f'Unexpected whence: {whence}')
+        if position < 0:
+            raise ValueError(f'Negative seek position: {position}')
+        self._position = position
+        return position
+    def readinto(self, b):
+        out = memoryview(b).cast('B')
+        n = 0
+        i = bisect.bisect_right(self._starts, self._position) - 1
+        while n < len(out) and self._position < self._size:
+            c = self._chunks[i]
+            chunk_offset = self._position - self._starts[i]
+            k = min(len(out) - n, len(c) - chunk_offset)
+            out[n:n + k] = c[chunk_offset:chunk_offset + k]
+            n = n + k
+            self._position = self._position + k
+            i = i + 1
+        return n
@@ -1,7 +1,10 @@
 import json
-from typing import Union
+import threading
+from typing import List, Union
 import requests
 from google.cloud import storage
+from ._chunks_reader import _ChunksReader
+from ._compression import _compress_chunks, _decompress
 
 def _http_json_post(url: str, obj: dict):
     r = requests.post(url, json=obj)
@@ -12,18 +15,32 @@ def _http_json_post(url: str, obj: dict):
         r.close()
 class _global:
     storage_client: Union[storage.Client, None] = None
+    storage_client_lock = threading.Lock()
 
-def _upload_json_to_google_cloud(bucket_name: str, destination_name: str, data: Union[list, dict, float, int, str], *, replace=True):
-    if _global.storage_client is None:
-        _global.storage_client = storage.Client()
+def _upload_json_to_google_cloud(bucket_name: str, destination_name: str, data: Union[list, dict, float, int, str], *, replace=True, object_class: Union[str, None]=None):
+    # object_class selects the compression settings (see _compression.py); None means no compression
+    data_bytes = json.dumps(data).encode('utf-8')
+    _upload_bytes_to_google_cloud(bucket_name, destination_name, [data_bytes], len(data_bytes), replace=replace, content_type='application/json', object_class=object_class)
+
+def _upload_bytes_to_google_cloud(bucket_name: str, destination_name: str, chunks: List[Union[bytes, memoryview]], size: int, *, replace=True, content_type: str='application/octet-stream', object_class: Union[str, None]=None):
+    # the chunks are streamed to the upload without first being joined into one buffer
+    # (this may be called from the worker threads of the upload pipeline)
+    with _global.storage_client_lock:
+        if _global.storage_client is None:
+            _global.storage_client = storage.Client()
     bucket = _global.storage_client.bucket(bucket_name)
     if not replace:
         if bucket.get_blob(destination_name) is not None:
             return
 
+    content_encoding = None
+    if object_class is not None:
+        chunks, size, content_encoding = _compress_chunks(chunks, object_class)
+
     blob = bucket.blob(destination_name)
+    blob.content_encoding = content_encoding
 
-    blob.upload_from_string(json.dumps(data).encode('utf-8'))
+    blob.upload_from_file(_ChunksReader(chunks), size=size, content_type=content_type)
 
 def _download_json_from_google_cloud(bucket_name: str, source_name: str):
     if _global.storage_client is None:
@@ -31,7 +48,7 @@ def _download_json_from_google_cloud(bucket_name: str, source_name: str):
     bucket = _global.storage_client.bucket(bucket_name)
     blob = bucket.get_blob(source_name)
     if blob is None: return None
-    return json.loads(blob.download_as_string())
+    return json.loads(_decompress(blob.download_as_string(), blob.content_encoding))
 
 def _pathify_hash(x: str):
     return f'{x[0]}{x[1]}/{x[2]}{x[3]}/{x[4]}{x[5]}/{x}'
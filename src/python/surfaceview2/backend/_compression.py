@@ -0,0 +1,95 @@
+import os
+import zlib
+from typing import Dict, List, Tuple, Union
+
+# Compression of objects uploaded to the bucket, configured per object class.
+# Compressed objects are uploaded with the matching Content-Encoding, so that the
+# browser decompresses them transparently (for gzip the bucket can also serve
+# decompressed data to clients that do not accept it).
+#
+# Object classes:
+#   task_result: results of interactive tasks (slices, surfaces, probes, ...)
+#   subfeed_message: individual subfeed messages
+#   subfeed_segment: consolidated subfeed segments (0-N), written once and read often
+#   subfeed_json: the subfeed.json index, which is small and rewritten often
+#
+# SURFACEVIEW2_UPLOAD_COMPRESSION overrides the settings of all classes,
+# for example 'none', 'gzip', 'gzip:6' or 'zstd:3'
+
+_default_settings: Dict[str, Tuple[Union[str, None], int]] = {
+    'task_result': ('gzip', 1),
+    'subfeed_message': ('gzip', 1),
+    'subfeed_segment': ('gzip', 9),
+    'subfeed_json': (None, 0)
+}
+
+_default_levels = {'gzip': 6, 'zstd': 3}
+
+class _global:
+    settings: Dict[str, Tuple[Union[str, None], int]] = dict(_default_settings)
+
+def set_upload_compression(object_class: str, method: Union[str, None], level: Union[int, None]=None):
+    if object_class not in _global.settings:
+        raise Exception(f'Unexpected object class: {object_class}')
+    _check_method(method)
+    _global.settings[object_class] = (method, level if level is not None else _default_levels.get(method, 0))
+
+def _parse_setting(x: str) -> Tuple[Union[str, None], int]:
+    a = x.split(':')
+    method = a[0] if a[0] != 'none' else None
+    _check_method(method)
+    level = int(a[1]) if len(a) > 1 else _default_levels.get(method, 0)
+    return method, level
+
+def _get_setting(object_class: str) -> Tuple[Union[str, None], int]:
+    override = os.getenv('SURFACEVIEW2_UPLOAD_COMPRESSION', None)
+    if override:
+        return _parse_setting(override)
+    return _global.settings[object_class]
+
+def _check_method(method: Union[str, None]):
+    if method not in [None, 'gzip', 'zstd']:
+        raise Exception(f'Unexpected compression method: {method}')
+    if method == 'zstd':
+        _import_zstandard()
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise Exception('The zstandard package is required for zstd compression')
+    return zstandard
+
+def _compress_chunks(chunks: List[Union[bytes, memoryview]], object_class: str) -> Tuple[List[Union[bytes, memoryview]], int, Union[str, None]]:
+    # returns (chunks, total size, content encoding)
+    method, level = _get_setting(object_class)
+    if method is None:
+        return chunks, sum([memoryview(c).nbytes for c in chunks]), None
+    if method == 'gzip':
+        # wbits=31 produces the gzip container
+        c = zlib.compressobj(level, zlib.DEFLATED, 31)
+        out = [c.compress(chunk) for chunk in chunks]
+        out.append(c.flush())
+    elif method == 'zstd':
+        zstandard = _import_zstandard()
+        c = zstandard.ZstdCompressor(level=level).compressobj()
+        out = [c.compress(chunk) for chunk in chunks]
+        out.append(c.flush())
+    else:
+        raise Exception(f'Unexpected compression method: {method}')
+    out = [x for x in out if len(x) > 0]
+    return out, sum([len(x) for x in out]), method
+
+def _decompress(data: bytes, content_encoding: Union[str, None]) -> bytes:
+    if not content_encoding:
+        return data
+    elif content_encoding == 'gzip':
+        # the data may already have been decompressed in transit
+        if data[:2] != b'\x1f\x8b':
+            return data
+        return zlib.decompress(data, 47)
+    elif content_encoding == 'zstd':
+        zstandard = _import_zstandard()
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    else:
+        raise Exception(f'Unexpected content encoding: {content_encoding}')
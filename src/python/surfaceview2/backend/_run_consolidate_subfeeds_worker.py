@@ -39,7 +39,7 @@ class SubfeedForConsolidating:
                 return
             consolidated_messages = consolidated_messages[:message_count]
             object_name = f'feeds/{_pathify_hash(self._feed_id)}/subfeeds/{_pathify_hash(self._subfeed_hash)}/0-{message_count - 1}'
-            _upload_json_to_google_cloud(google_bucket_name, object_name, consolidated_messages, replace=False)
+            _upload_json_to_google_cloud(google_bucket_name, object_name, consolidated_messages, replace=False, object_class='subfeed_segment')
             
             # download again to be sure we have latest version
             subfeed_json = _download_json_from_google_cloud(google_bucket_name, p)
@@ -47,7 +47,7 @@ class SubfeedForConsolidating:
                 print(f'WARNING: unexpected subfeed_json is none during message consolidation')
                 return
             subfeed_json['consolidatedCount'] = message_count
-            _upload_json_to_google_cloud(google_bucket_name, p, subfeed_json, replace=True) # maybe a race condition here. :(
+            _upload_json_to_google_cloud(google_bucket_name, p, subfeed_json, replace=True, object_class='subfeed_json') # maybe a race condition here. :(
 
 def _run_consolidate_subfeeds_worker(pipe_to_parent: Connection, google_bucket_name: str):
     subfeeds_for_consolidating: Dict[str, SubfeedForConsolidating] = {}
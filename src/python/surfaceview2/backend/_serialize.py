@@ -1,4 +1,5 @@
 import base64
+import json
 import numpy as np
 
 def _serialize(x):
@@ -21,16 +22,40 @@ def _serialize(x):
             'dtype': str(x.dtype),
             'data_b64': base64.b64encode(x.ravel(order='C')).decode()
         }
+    elif (x is None) or isinstance(x, (str, bool, int, float)):
+        return x
     else:
         if _is_jsonable(x):
-            # this will capture int, float, str, bool
             return x
     raise Exception(f'Item is not json safe: {type(x)}')
 
+def _serialize_json_bytes(x) -> bytes:
+    # Equivalent to json.dumps(_serialize(x)).encode('utf-8') in a single pass of the (C) json
+    # encoder, without building the intermediate tree: only the numpy leaves go through _json_default.
+    # The size of the encoded message is len() of the result.
+    return _json_encoder.encode(x).encode('utf-8')
+
+def _json_default(x):
+    if isinstance(x, np.ndarray):
+        return {
+            '_type': 'ndarray',
+            'shape': [int(s) for s in x.shape],
+            'dtype': str(x.dtype),
+            'data_b64': base64.b64encode(x.ravel(order='C')).decode()
+        }
+    elif isinstance(x, np.integer):
+        return int(x)
+    elif isinstance(x, np.floating):
+        return float(x)
+    elif isinstance(x, np.bool_):
+        return bool(x)
+    raise Exception(f'Item is not json safe: {type(x)}')
+
+_json_encoder = json.JSONEncoder(default=_json_default)
+
 def _is_jsonable(x) -> bool:
-    import json
     try:
         json.dumps(x)
         return True
     except:
-        return False
\ No newline at end of file
+        return False
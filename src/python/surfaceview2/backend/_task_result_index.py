@@ -0,0 +1,88 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Union
+
+class _TaskResultIndex:
+    # Local index of the task results that have been uploaded to task_results/<hash>,
+    # so that a repeated task can be reported as finished without running its job again.
+    # Entries record the function id and the version of the underlying hither function;
+    # an entry is only used while that version is current for the function id. The current
+    # versions are learned from the jobs created by this process, so each function runs at
+    # least once per process before its entries are used.
+    # Entries are evicted least recently used beyond max_entries, and expire after max_age_sec
+    # (uploaded objects may be removed from the bucket).
+    # If path is given, the index is saved there (see save()) and loaded on startup.
+    def __init__(self, *, max_entries: int=100000, max_age_sec: float=60 * 60 * 24, path: Union[str, None]=None):
+        self._max_entries = max_entries
+        self._max_age_sec = max_age_sec
+        self._path = path
+        # task_hash -> (function_id, function_version, timestamp)
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._current_versions: Dict[str, Union[str, None]] = {}
+        self._dirty = False
+        self._last_save_timestamp = time.time()
+        self._num_hits = 0
+        self._num_misses = 0
+        if path is not None and os.path.exists(path):
+            self._load()
+    def lookup(self, task_hash: str, function_id: str) -> bool:
+        e = self._entries.get(task_hash, None)
+        if e is not None:
+            if (e[0] != function_id) or (time.time() - e[2] > self._max_age_sec):
+                del self._entries[task_hash]
+                self._dirty = True
+                e = None
+            elif (function_id not in self._current_versions) or (e[1] != self._current_versions[function_id]):
+                e = None
+        if e is None:
+            self._num_misses = self._num_misses + 1
+            return False
+        self._entries.move_to_end(task_hash)
+        self._num_hits = self._num_hits + 1
+        return True
+    def set_current_version(self, function_id: str, function_version: Union[str, None]):
+        if (function_id in self._current_versions) and (self._current_versions[function_id] == function_version):
+            return
+        self._current_versions[function_id] = function_version
+        # invalidate the results of other versions of this function
+        for task_hash in [k for k, e in self._entries.items() if e[0] == function_id and e[1] != function_version]:
+            del self._entries[task_hash]
+            self._dirty = True
+    def add(self, task_hash: str, function_id: str, function_version: Union[str, None]):
+        if task_hash in self._entries:
+            del self._entries[task_hash]
+        self._entries[task_hash] = (function_id, function_version, time.time())
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+    def stats(self) -> dict:
+        return {
+            'numEntries': len(self._entries),
+            'numHits': self._num_hits,
+            'numMisses': self._num_misses
+        }
+    def save(self, *, min_interval_sec: float=0):
+        if (self._path is None) or (not self._dirty):
+            return
+        if time.time() - self._last_save_timestamp < min_interval_sec:
+            return
+        self._last_save_timestamp = time.time()
+        self._dirty = False
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump([[k, e[0], e[1], e[2]] for k, e in self._entries.items()], f)
+        os.replace(tmp_path, self._path)
+    def _load(self):
+        try:
+            with open(self._path, 'r') as f:
+                x = json.load(f)
+        except Exception as e:
+            print('WARNING: Problem loading task result index', e)
+            return
+        for task_hash, function_id, function_version, timestamp in x:
+            if time.time() - timestamp <= self._max_age_sec:
+                self._entries[task_hash] = (function_id, function_version, timestamp)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,126 @@
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple, Union
+
+from ..config.job_handler import misc_num_workers
+
+# Priority classes of task functions (declared with @taskfunction(..., priority_class=...)).
+# Queued tasks of a class with a lower priority value start first. Each class may have
+# at most max_running tasks running at once, and at most max_running_total tasks run
+# in total (the number of workers of job_handler.misc, which all task jobs share).
+# A class with preempt=True may cancel running tasks of lower priority classes when
+# no worker is free; the preempted tasks are queued again and restarted later.
+# A task is preempted at most once, and interactive tasks leave one worker to the
+# other classes, so that those are not starved or canceled over and over.
+max_running_total = misc_num_workers
+
+_priority_classes: Dict[str, dict] = {
+    'interactive': {'priority': 0, 'max_running': max(max_running_total - 1, 1), 'preempt': True},
+    'surface': {'priority': 1, 'max_running': 3, 'preempt': False},
+    'default': {'priority': 2, 'max_running': 3, 'preempt': False},
+    'model_info': {'priority': 3, 'max_running': 1, 'preempt': False}
+}
+
+class _TaskRequest:
+    # a task that has been requested but whose job is not (or no longer) running
+    def __init__(self, *, task_hash: str, task_data: dict, create_job: Callable, result_encoding: str, priority_class: str):
+        self.task_hash = task_hash
+        self.task_data = task_data
+        self.create_job = create_job
+        self.result_encoding = result_encoding
+        self.priority_class = priority_class
+        self.queued_timestamp = time.time()
+        self.last_keep_alive_timestamp = time.time()
+        self.num_preemptions = 0
+
+class _TaskScheduler:
+    def __init__(self):
+        self._queues: Dict[str, Deque[_TaskRequest]] = {c: deque() for c in _priority_classes.keys()}
+        self._metrics: Dict[str, dict] = {c: _empty_metrics() for c in _priority_classes.keys()}
+    def enqueue(self, request: _TaskRequest, *, front: bool=False):
+        if front:
+            self._queues[request.priority_class].appendleft(request)
+        else:
+            self._queues[request.priority_class].append(request)
+    def find(self, task_hash: str) -> Union[_TaskRequest, None]:
+        for q in self._queues.values():
+            for r in q:
+                if r.task_hash == task_hash:
+                    return r
+        return None
+    def remove(self, task_hash: str) -> bool:
+        for q in self._queues.values():
+            for r in q:
+                if r.task_hash == task_hash:
+                    q.remove(r)
+                    return True
+        return False
+    def remove_expired(self, timeout_sec: float) -> List[_TaskRequest]:
+        ret: List[_TaskRequest] = []
+        for c, q in self._queues.items():
+            expired = [r for r in q if time.time() - r.last_keep_alive_timestamp > timeout_sec]
+            for r in expired:
+                q.remove(r)
+            ret.extend(expired)
+        return ret
+    def select(self, running: List[Tuple[str, str, float, int]]) -> Tuple[List[_TaskRequest], List[str]]:
+        # running: (task_hash, priority_class, start timestamp, number of times preempted) of the running tasks
+        # returns (requests to start, hashes of the running tasks to preempt)
+        counts = {c: 0 for c in _priority_classes.keys()}
+        for _, c, _, _ in running:
+            counts[c] = counts[c] + 1
+        total = len(running)
+        to_start: List[_TaskRequest] = []
+        to_preempt: List[str] = []
+        for c in sorted(_priority_classes.keys(), key=lambda c: _priority_classes[c]['priority']):
+            pc = _priority_classes[c]
+            q = self._queues[c]
+            while len(q) > 0 and counts[c] < pc['max_running']:
+                if total >= max_running_total:
+                    if not pc['preempt']:
+                        break
+                    # preempt a task of the lowest priority class running, the most recently started one (least work lost)
+                    candidates = [
+                        r for r in running
+                        if _priority_classes[r[1]]['priority'] > pc['priority'] and r[3] == 0 and r[0] not in to_preempt
+                    ]
+                    if len(candidates) == 0:
+                        break
+                    victim = max(candidates, key=lambda r: (_priority_classes[r[1]]['priority'], r[2]))
+                    to_preempt.append(victim[0])
+                    counts[victim[1]] = counts[victim[1]] - 1
+                    total = total - 1
+                    self._metrics[victim[1]]['numPreempted'] += 1
+                request = q.popleft()
+                self._record_start(request)
+                to_start.append(request)
+                counts[c] = counts[c] + 1
+                total = total + 1
+        return to_start, to_preempt
+    def stats(self) -> dict:
+        ret = {}
+        for c, m in self._metrics.items():
+            ret[c] = {
+                'numQueued': len(self._queues[c]),
+                'numStarted': m['numStarted'],
+                'numPreempted': m['numPreempted'],
+                'queueWaitSecMean': m['totalQueueWaitSec'] / m['numStarted'] if m['numStarted'] > 0 else 0,
+                'queueWaitSecMax': m['maxQueueWaitSec'],
+                'queueWaitSecLast': m['lastQueueWaitSec'],
+                'oldestQueuedSec': time.time() - self._queues[c][0].queued_timestamp if len(self._queues[c]) > 0 else 0
+            }
+        return ret
+    def _record_start(self, request: _TaskRequest):
+        m = self._metrics[request.priority_class]
+        wait = time.time() - request.queued_timestamp
+        m['numStarted'] += 1
+        m['totalQueueWaitSec'] += wait
+        m['maxQueueWaitSec'] = max(m['maxQueueWaitSec'], wait)
+        m['lastQueueWaitSec'] = wait
+
+def _empty_metrics() -> dict:
+    return {'numStarted': 0, 'numPreempted': 0, 'totalQueueWaitSec': 0, 'maxQueueWaitSec': 0, 'lastQueueWaitSec': 0}
+
+def _check_priority_class(priority_class: str):
+    if priority_class not in _priority_classes:
+        raise Exception(f'Unexpected priority class: {priority_class}')
@@ -0,0 +1,81 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple, Union
+
+class _UploadPipeline:
+    # Runs result serialization and upload jobs in a bounded thread pool, off the backend main loop.
+    # At most max_in_flight jobs are accepted at once (submit() returns False beyond that), so
+    # the caller holds on to further results until there is capacity (backpressure).
+    # Completed jobs are collected from the main loop with pop_completed().
+    def __init__(self, *, num_workers: int=4, max_in_flight: int=8):
+        self._executor = ThreadPoolExecutor(max_workers=num_workers)
+        self._max_in_flight = max_in_flight
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._num_in_progress = 0
+        self._num_completed = 0
+        self._num_failed = 0
+        self._num_bytes = 0
+        self._total_upload_sec = 0
+        self._max_upload_sec = 0
+        self._total_queue_wait_sec = 0
+        self._max_queue_wait_sec = 0
+    def has_capacity(self) -> bool:
+        return len(self._in_flight) < self._max_in_flight
+    def submit(self, key: str, upload: Callable[[], int], *, queued_timestamp: Union[float, None]=None) -> bool:
+        # upload() returns the number of bytes uploaded
+        if (key in self._in_flight) or (not self.has_capacity()):
+            return False
+        if queued_timestamp is None:
+            queued_timestamp = time.time()
+        self._in_flight[key] = self._executor.submit(self._run, upload, queued_timestamp)
+        return True
+    def pop_completed(self) -> List[Tuple[str, Union[Exception, None]]]:
+        # returns (key, exception or None) for the jobs that completed since the last call
+        ret: List[Tuple[str, Union[Exception, None]]] = []
+        for key, f in list(self._in_flight.items()):
+            if f.done():
+                del self._in_flight[key]
+                ret.append((key, f.exception()))
+        return ret
+    def stats(self) -> dict:
+        with self._lock:
+            num_done = self._num_completed + self._num_failed
+            return {
+                'numInFlight': len(self._in_flight),
+                'numInProgress': self._num_in_progress,
+                'numQueued': len(self._in_flight) - self._num_in_progress,
+                'numCompleted': self._num_completed,
+                'numFailed': self._num_failed,
+                'numBytesUploaded': self._num_bytes,
+                'uploadSecMean': self._total_upload_sec / num_done if num_done > 0 else 0,
+                'uploadSecMax': self._max_upload_sec,
+                'queueWaitSecMean': self._total_queue_wait_sec / num_done if num_done > 0 else 0,
+                'queueWaitSecMax': self._max_queue_wait_sec
+            }
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+    def _run(self, upload: Callable[[], int], queued_timestamp: float):
+        timer = time.time()
+        with self._lock:
+            self._num_in_progress = self._num_in_progress + 1
+            wait = timer - queued_timestamp
+            self._total_queue_wait_sec = self._total_queue_wait_sec + wait
+            self._max_queue_wait_sec = max(self._max_queue_wait_sec, wait)
+        num_bytes = 0
+        succeeded = False
+        try:
+            num_bytes = upload()
+            succeeded = True
+        finally:
+            elapsed = time.time() - timer
+            with self._lock:
+                self._num_in_progress = self._num_in_progress - 1
+                if succeeded:
+                    self._num_completed = self._num_completed + 1
+                else:
+                    self._num_failed = self._num_failed + 1
+                self._num_bytes = self._num_bytes + num_bytes
+                self._total_upload_sec = self._total_upload_sec + elapsed
+                self._max_upload_sec = max(self._max_upload_sec, elapsed)
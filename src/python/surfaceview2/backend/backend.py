@@ -1,3 +1,4 @@
+import os
 import time
 import json
 import uuid
@@ -10,8 +11,9 @@ from ._verify_oauth2_token import _verify_oauth2_token
 from .subfeed_manager import SubfeedManager
 
 from .task_manager import TaskManager
-from .taskfunction import find_taskfunction
+from .taskfunction import find_taskfunction, find_taskfunction_priority_class, find_taskfunction_result_encoding
 from ._common import _http_json_post, _upload_json_to_google_cloud
+from ._serialize import _serialize_json_bytes
 import paho.mqtt.client as mqtt
 from ..package_name import package_name
 
@@ -78,7 +80,7 @@ class AblyClientChannel:
     def __init__(self, parent: AblyClient, channel: str):
         self._parent = parent
         self._channel = channel
-        self._message_buffer: List = []
+        self._message_buffer: List[bytes] = []
         self._message_buffer_size = 0
         self._last_send_message_buffer_timestamp = time.time()
 
@@ -87,10 +89,12 @@ class AblyClientChannel:
 
     def _queue_message(self, msg):
         max_size = 10000
-        msg_size = len(json.dumps(msg))
+        # messages are encoded once here; the buffer holds the encoded messages
+        msg_encoded = _serialize_json_bytes(msg)
+        msg_size = len(msg_encoded)
         if (len(self._message_buffer) > 0) and (self._message_buffer_size + msg_size > max_size):
             self._send_message_buffer()
-        self._message_buffer.append(msg)
+        self._message_buffer.append(msg_encoded)
         self._message_buffer_size = self._message_buffer_size + msg_size
 
     def _send_message_buffer(self):
@@ -101,8 +105,7 @@ class AblyClientChannel:
         self._message_buffer = []
         self._message_buffer_size = 0
         if self._parent._client:
-            self._parent._client.publish(self._channel, json.dumps(
-                {'messages': messages}).encode('utf-8'), qos=1)
+            self._parent._client.publish(self._channel, b'{"messages": [' + b', '.join(messages) + b']}', qos=1)
 
     def iterate(self):
         elapsed = time.time() - self._last_send_message_buffer_timestamp
@@ -120,6 +123,7 @@ class Backend:
         self._last_registration_attempt_timestamp = 0
         self._last_report_alive_timestamp = 0
         self._last_update_user_permissions_timestamp = 0
+        self._last_log_stats_timestamp = time.time()
         self._secret: Union[str, None] = None
         self._user_permissions: Dict[str, dict] = {}
         self._admin_user_id = admin_user_id
@@ -171,6 +175,11 @@ class Backend:
         self._subfeed_manager.iterate()
         self._ably_client.iterate()
 
+        # log the task manager stats (scheduler, uploads, supersede groups, result index, disk cache)
+        elapsed_since_log_stats = time.time() - self._last_log_stats_timestamp
+        if elapsed_since_log_stats > stats_log_interval_sec:
+            self._log_stats()
+
     def cleanup(self):
         self._task_manager.cleanup()
         self._subfeed_manager.cleanup()
@@ -201,12 +210,15 @@ class Backend:
             #         kwargs: JSONObject
             #     }
             #     taskHash: Sha1Hash
+            #     supersedeGroup?: string
             # }
             try:
                 task_hash = message.get('taskHash')
                 task_data = message.get('task')
                 function_id = task_data.get('functionId')
                 kwargs = task_data.get('kwargs')
+                # optional: a newer task in the same group supersedes this one
+                supersede_group = message.get('supersedeGroup', None)
             except Exception as e:
                 print(e)
                 print('Unexpected problem parsing task payload')
@@ -214,14 +226,18 @@ class Backend:
                 task_data = None
                 function_id = None
                 kwargs = None
+                supersede_group = None
             if task_hash is not None and task_data is not None and function_id is not None and kwargs is not None:
                 # todo: verify the task hash here
                 td = find_taskfunction(function_id)
-                if td is not None:
+                if td is not None and self._task_manager.report_existing_task_result(task_hash, function_id, supersede_group=supersede_group):
+                    # the result has already been uploaded, no need to run the job
+                    pass
+                elif td is not None:
                     try:
-                        taskjob = td(**kwargs)
                         self._task_manager.add_task(
-                            task_hash, task_data, taskjob)
+                            task_hash, task_data, _job_creator(td, kwargs), result_encoding=find_taskfunction_result_encoding(function_id),
+                            priority_class=find_taskfunction_priority_class(function_id), supersede_group=supersede_group)
                     except Exception as e:
                         msg = {'type': 'taskStatusUpdate', 'taskHash': task_hash,
                                'status': 'error', 'error': f'Unable to create job: {str(e)}'}
@@ -281,7 +297,8 @@ class Backend:
         elif type0 == 'getBackendInfo':
             msg = {
                 'type': 'backendInfo',
-                'pythonProjectVersion': __version__
+                'pythonProjectVersion': __version__,
+                'stats': self._task_manager.stats()
             }
             self._ably_client.publish(
                 self._registration['serverChannelName'], msg)
@@ -298,6 +315,10 @@ class Backend:
                 self._registration['serverChannelName'], msg)
         self._upload_config_object_to_google_cloud()
 
+    def _log_stats(self):
+        self._last_log_stats_timestamp = time.time()
+        print(f'Backend stats: {_serialize_json_bytes(self._task_manager.stats()).decode("utf-8")}')
+
     def _publish_to_task_status(self, msg: dict):
         self._ably_client.publish(self._registration['serverChannelName'], msg)
 
@@ -377,9 +398,19 @@ class Backend:
         return False
 
 
+stats_log_interval_sec = float(os.getenv('SURFACEVIEW2_STATS_LOG_INTERVAL_SEC', '300'))
+
+
 def _random_id():
     return str(uuid.uuid4())[-12:]
 
 
 def _sha1_of_string(x: str):
     return hashlib.sha1(x.encode('utf-8')).hexdigest()
+
+
+def _job_creator(td: Callable, kwargs: dict):
+    # the job is created when the task manager starts the task
+    def create_job():
+        return td(**kwargs)
+    return create_job
@@ -30,7 +30,7 @@ class Subfeed:
         for i in range(len(messages)):
             message_num = position + i
             object_name = f'feeds/{_pathify_hash(self._feed_id)}/subfeeds/{_pathify_hash(self._subfeed_hash)}/{message_num}'
-            _upload_json_to_google_cloud(self._google_bucket_name, object_name, messages[i], replace=False)
+            _upload_json_to_google_cloud(self._google_bucket_name, object_name, messages[i], replace=False, object_class='subfeed_message')
         message_count = position + len(messages)
 
         p = f'feeds/{_pathify_hash(self._feed_id)}/subfeeds/{_pathify_hash(self._subfeed_hash)}/subfeed.json'
@@ -38,7 +38,7 @@ class Subfeed:
         if subfeed_json is None:
             subfeed_json = {}
         subfeed_json['messageCount'] = message_count
-        _upload_json_to_google_cloud(self._google_bucket_name, p, subfeed_json, replace=True) # maybe a race condition here :(
+        _upload_json_to_google_cloud(self._google_bucket_name, p, subfeed_json, replace=True, object_class='subfeed_json') # maybe a race condition here :(
 
         msg = {'type': 'subfeedUpdate', 'feedId': self._feed_id, 'subfeedHash': self._subfeed_hash, 'messageCount': message_count}
         self._on_publish_message(msg)
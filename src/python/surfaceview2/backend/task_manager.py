@@ -1,9 +1,15 @@
+import os
 import time
 import json
-from typing import Callable, Dict
+from typing import Callable, Dict, Set, Union
 import hither2 as hi
-from ._common import _upload_json_to_google_cloud, _pathify_hash
-from ._serialize import _serialize
+from .._array_store import disk_cache_stats
+from ._binary_result import _encode_binary_result
+from ._common import _upload_bytes_to_google_cloud, _pathify_hash
+from ._serialize import _serialize_json_bytes
+from ._task_result_index import _TaskResultIndex
+from ._task_scheduler import _TaskRequest, _TaskScheduler
+from ._upload_pipeline import _UploadPipeline
 
 job_handler = hi.ParallelJobHandler(4)
 
@@ -37,14 +43,22 @@ def return_42(delay: float):
 #         return hi.Job(load_surface, {'uri': uri})
 
 class Task:
-    def __init__(self, *, on_publish_message: Callable, google_bucket_name: str, task_hash: str, task_data: dict, job: hi.Job):
+    def __init__(self, *, on_publish_message: Callable, google_bucket_name: str, task_hash: str, task_data: dict, job: hi.Job, result_encoding: str='json', on_result_uploaded: Union[Callable, None]=None, request: Union[_TaskRequest, None]=None):
         self._on_publish_message = on_publish_message
+        self._on_result_uploaded = on_result_uploaded
         self._google_bucket_name = google_bucket_name
+        self._result_encoding = result_encoding
         self._task_hash = task_hash
         self._task_data = task_data
         self._status = job.status
         self._job = job
-        self._last_keep_alive_timestamp = time.time()
+        self._last_keep_alive_timestamp = time.time() if request is None else request.last_keep_alive_timestamp
+        self._request = request
+        self._start_timestamp = time.time()
+        # the job may already be finished when the task is created (e.g. found in the job cache)
+        self._finished_timestamp: Union[float, None] = time.time() if job.status == 'finished' else None
+        self._result_uploaded = False
+        self._upload_submitted = False
         self._canceled = False
         self._publish_status_update()
     @property
@@ -53,10 +67,23 @@ class Task:
     @property
     def job(self):
         return self._job
+    @property
+    def request(self) -> Union[_TaskRequest, None]:
+        return self._request
+    @property
+    def start_timestamp(self):
+        return self._start_timestamp
+    @property
+    def finished_timestamp(self):
+        return self._finished_timestamp
     def iterate(self):
         if self._status != self._job.status:
             self._status = self._job.status
-            self._publish_status_update()
+            if self._status == 'finished':
+                # reported once the result has been uploaded (see TaskManager)
+                self._finished_timestamp = time.time()
+            else:
+                self._publish_status_update()
     def cancel(self):
         print(f'Canceling task: {self._job.function_name}')
         self._canceled = True
@@ -68,22 +95,40 @@ class Task:
     def _publish_status_update(self):
         if self._canceled:
             return
-        msg = {'type': 'taskStatusUpdate', 'taskHash': self._task_hash, 'status': self._status}
-        if self._status == 'error':
+        status = self._status
+        if (status == 'finished') and (not self._result_uploaded):
+            # the result is still being uploaded
+            status = 'running'
+        msg = {'type': 'taskStatusUpdate', 'taskHash': self._task_hash, 'status': status}
+        if status == 'error':
             msg['error'] = str(self._job.result.error)
-        elif self._status == 'finished':
-            try:
-                return_value_serialized = _serialize(self._job.result.return_value)
-            except Exception as e:
-                print(self._job.result.return_value)
-                print('WARNING: Problem serializing return value', e)
-                return
-            try:
-                _upload_json_to_google_cloud(self._google_bucket_name, f'task_results/{_pathify_hash(self._task_hash)}', return_value_serialized)
-            except Exception as e:
-                print('WARNING: Problem uploading return value to cloud', e)
-                return
         self._on_publish_message(msg)
+    def _upload_result(self) -> int:
+        # runs in a worker thread of the upload pipeline; returns the number of bytes uploaded
+        try:
+            if self._result_encoding == 'binary':
+                chunks, size = _encode_binary_result(self._job.result.return_value)
+            else:
+                return_value_bytes = _serialize_json_bytes(self._job.result.return_value)
+                chunks, size = [return_value_bytes], len(return_value_bytes)
+        except Exception as e:
+            print(self._job.result.return_value)
+            print('WARNING: Problem serializing return value', e)
+            raise
+        try:
+            object_name = f'task_results/{_pathify_hash(self._task_hash)}'
+            content_type = 'application/octet-stream' if self._result_encoding == 'binary' else 'application/json'
+            _upload_bytes_to_google_cloud(self._google_bucket_name, object_name, chunks, size, content_type=content_type, object_class='task_result')
+        except Exception as e:
+            print('WARNING: Problem uploading return value to cloud', e)
+            raise
+        return size
+    def _on_upload_complete(self):
+        # called from the main loop
+        self._result_uploaded = True
+        if self._on_result_uploaded is not None:
+            self._on_result_uploaded(self)
+        self._publish_status_update()
 
 task_timeout_sec = 60 * 3
 
@@ -92,29 +137,182 @@ class TaskManager:
         self._tasks: Dict[str, Task] = {}
         self._on_publish_message = on_publish_message
         self._google_bucket_name = google_bucket_name
+        self._result_index = _TaskResultIndex(path=os.getenv('SURFACEVIEW2_TASK_RESULT_INDEX_PATH', None))
+        self._scheduler = _TaskScheduler()
+        # supersede groups: the latest task requested in each group, and the groups (None for
+        # requests without a group) that are still interested in each queued or running task
+        self._supersede_groups: Dict[str, str] = {}
+        self._task_interests: Dict[str, Set[Union[str, None]]] = {}
+        self._num_superseded_queued = 0
+        self._num_superseded_running = 0
+        # finished tasks whose results are being serialized and uploaded off the main loop
+        self._uploading: Dict[str, Task] = {}
+        self._upload_pipeline = _UploadPipeline(num_workers=4, max_in_flight=8)
     def cleanup(self):
-        pass
-    def add_task(self, task_hash: str, task_data: dict, job: hi.Job):
+        self._upload_pipeline.shutdown()
+        self._result_index.save()
+    def report_existing_task_result(self, task_hash: str, function_id: str, supersede_group: Union[str, None]=None) -> bool:
+        # to be called before the job is created: if the result of this task has already
+        # been uploaded, report the task as finished and return True
+        if task_hash in self._tasks or task_hash in self._uploading or self._scheduler.find(task_hash) is not None:
+            return False
+        if not self._result_index.lookup(task_hash, function_id):
+            return False
+        # still cancel the previous task of the group, but don't record this (finished) task as the
+        # latest in the group: there is no task interest that would remove the entry later
+        self._supersede(task_hash, supersede_group)
+        if (supersede_group is not None) and (self._supersede_groups.get(supersede_group, None) == task_hash):
+            del self._supersede_groups[supersede_group]
+        self._on_publish_message({'type': 'taskStatusUpdate', 'taskHash': task_hash, 'status': 'finished'})
+        return True
+    def add_task(self, task_hash: str, task_data: dict, create_job: Callable[[], hi.Job], result_encoding: str='json', priority_class: str='default', supersede_group: Union[str, None]=None):
+        # the job is created by create_job() when the scheduler starts the task
+        # a newer task in the same supersede group cancels this one (unless it was also requested otherwise)
+        self._supersede(task_hash, supersede_group)
+        self._task_interests.setdefault(task_hash, set()).add(supersede_group)
         if task_hash in self._tasks:
             self._tasks[task_hash]._publish_status_update() # do this so the requester knows that it is already running
-            return self._tasks[task_hash]
-        t = Task(on_publish_message=self._on_publish_message, google_bucket_name=self._google_bucket_name, task_hash=task_hash, task_data=task_data, job=job)
-        self._tasks[task_hash] = t
-        return t
+            return
+        if task_hash in self._uploading:
+            self._uploading[task_hash]._publish_status_update()
+            return
+        if self._scheduler.find(task_hash) is not None:
+            self._publish_queued(task_hash)
+            return
+        self._scheduler.enqueue(_TaskRequest(task_hash=task_hash, task_data=task_data, create_job=create_job, result_encoding=result_encoding, priority_class=priority_class))
+        self._publish_queued(task_hash)
+        self._start_tasks()
+    def result_index_stats(self):
+        return self._result_index.stats()
+    def scheduler_stats(self):
+        return self._scheduler.stats()
+    def supersede_stats(self):
+        return {
+            'numGroups': len(self._supersede_groups),
+            'numSupersededQueued': self._num_superseded_queued,
+            'numSupersededRunning': self._num_superseded_running
+        }
+    def upload_stats(self):
+        ret = self._upload_pipeline.stats()
+        ret['numWaitingForCapacity'] = len([t for t in self._uploading.values() if not t._upload_submitted])
+        return ret
+    def stats(self):
+        # the in-process load caches live in the job processes and are not reported here;
+        # the on-disk cache is shared by those processes
+        return {
+            'numRunning': len(self._tasks),
+            'numUploading': len(self._uploading),
+            'scheduler': self.scheduler_stats(),
+            'uploads': self.upload_stats(),
+            'supersede': self.supersede_stats(),
+            'resultIndex': self.result_index_stats(),
+            'diskCache': disk_cache_stats()
+        }
     def keep_alive_task(self, task_hash: str):
         if task_hash in self._tasks:
             self._tasks[task_hash].keep_alive()
+        else:
+            r = self._scheduler.find(task_hash)
+            if r is not None:
+                r.last_keep_alive_timestamp = time.time()
     def iterate(self):
         hi.wait(0)
         task_hashes = list(self._tasks.keys())
         for task_hash in task_hashes:
             task = self._tasks[task_hash]
             task.iterate()
-            if task.status in ['error', 'finished']:
+            if task.status == 'finished':
+                del self._tasks[task_hash]
+                self._uploading[task_hash] = task
+            elif task.status == 'error':
                 del self._tasks[task_hash]
+                self._forget_task(task_hash)
             else:
                 elapsed = task.elapsed_since_keep_alive()
                 if elapsed > task_timeout_sec:
                     task.cancel()
                     del self._tasks[task_hash]
-                
+                    self._forget_task(task_hash)
+        for request in self._scheduler.remove_expired(task_timeout_sec):
+            self._forget_task(request.task_hash)
+        self._process_uploads()
+        self._start_tasks()
+        self._result_index.save(min_interval_sec=30)
+    def _process_uploads(self):
+        for task_hash, exception in self._upload_pipeline.pop_completed():
+            task = self._uploading.pop(task_hash)
+            if exception is None:
+                task._on_upload_complete()
+            else:
+                self._on_publish_message({'type': 'taskStatusUpdate', 'taskHash': task_hash, 'status': 'error', 'error': f'Problem uploading result: {str(exception)}'})
+            self._forget_task(task_hash)
+        # submit the waiting results in the order the tasks finished, as long as there is capacity
+        waiting = sorted([t for t in self._uploading.values() if not t._upload_submitted], key=lambda t: t.finished_timestamp)
+        for task in waiting:
+            if not self._upload_pipeline.submit(task._task_hash, task._upload_result, queued_timestamp=task.finished_timestamp):
+                break
+            task._upload_submitted = True
+    def _start_tasks(self):
+        if any([not t._upload_submitted for t in self._uploading.values()]):
+            # backpressure: hold off starting jobs while finished results wait for the upload pipeline
+            return
+        running = [(h, t.request.priority_class, t.start_timestamp, t.request.num_preemptions) for h, t in self._tasks.items()]
+        to_start, to_preempt = self._scheduler.select(running)
+        for task_hash in to_preempt:
+            task = self._tasks[task_hash]
+            print(f'Preempting task: {task.job.function_name}')
+            task.cancel()
+            del self._tasks[task_hash]
+            task.request.last_keep_alive_timestamp = task._last_keep_alive_timestamp
+            # the queue wait is measured from the preemption, not from the original request
+            task.request.queued_timestamp = time.time()
+            task.request.num_preemptions = task.request.num_preemptions + 1
+            self._scheduler.enqueue(task.request, front=True)
+            self._publish_queued(task_hash)
+        for request in to_start:
+            try:
+                job = request.create_job()
+            except Exception as e:
+                self._on_publish_message({'type': 'taskStatusUpdate', 'taskHash': request.task_hash, 'status': 'error', 'error': f'Unable to create job: {str(e)}'})
+                self._forget_task(request.task_hash)
+                continue
+            self._result_index.set_current_version(request.task_data['functionId'], _job_function_version(job))
+            t = Task(on_publish_message=self._on_publish_message, google_bucket_name=self._google_bucket_name, task_hash=request.task_hash, task_data=request.task_data, job=job, result_encoding=request.result_encoding, on_result_uploaded=self._on_result_uploaded, request=request)
+            self._tasks[request.task_hash] = t
+    def _supersede(self, task_hash: str, supersede_group: Union[str, None]):
+        if supersede_group is None:
+            return
+        previous_task_hash = self._supersede_groups.get(supersede_group, None)
+        self._supersede_groups[supersede_group] = task_hash
+        if (previous_task_hash is None) or (previous_task_hash == task_hash):
+            return
+        interests = self._task_interests.get(previous_task_hash, None)
+        if interests is None:
+            return
+        interests.discard(supersede_group)
+        if len(interests) > 0:
+            return
+        if previous_task_hash in self._uploading:
+            # the result is almost available; let the upload complete
+            return
+        # nobody is waiting for the previous task anymore: free its worker or its place in the queue
+        if previous_task_hash in self._tasks:
+            self._tasks[previous_task_hash].cancel()
+            del self._tasks[previous_task_hash]
+            self._num_superseded_running = self._num_superseded_running + 1
+        elif self._scheduler.remove(previous_task_hash):
+            self._num_superseded_queued = self._num_superseded_queued + 1
+        self._forget_task(previous_task_hash)
+        self._on_publish_message({'type': 'taskStatusUpdate', 'taskHash': previous_task_hash, 'status': 'error', 'error': 'Superseded by a newer request', 'superseded': True})
+    def _forget_task(self, task_hash: str):
+        interests = self._task_interests.pop(task_hash, set())
+        for g in interests:
+            if (g is not None) and (self._supersede_groups.get(g, None) == task_hash):
+                del self._supersede_groups[g]
+    def _publish_queued(self, task_hash: str):
+        self._on_publish_message({'type': 'taskStatusUpdate', 'taskHash': task_hash, 'status': 'queued'})
+    def _on_result_uploaded(self, task: Task):
+        self._result_index.add(task._task_hash, task._task_data['functionId'], _job_function_version(task.job))
+
+def _job_function_version(job: hi.Job) -> Union[str, None]:
+    return getattr(job, 'function_version', None)
\ No newline at end of file
@@ -1,7 +1,10 @@
 from typing import Any, Callable, Dict, Union
 import hither2 as hi
+from ._task_scheduler import _check_priority_class
 
 _global_registered_taskfunctions_by_function_id: Dict[str, Callable] = {}
+_global_result_encodings_by_function_id: Dict[str, str] = {}
+_global_priority_classes_by_function_id: Dict[str, str] = {}
 
 def find_taskfunction(function_id: str) -> Union[Callable, None]:
     if function_id in _global_registered_taskfunctions_by_function_id:
@@ -9,9 +12,22 @@ def find_taskfunction(function_id: str) -> Union[Callable, None]:
     else:
         return None
 
-def taskfunction(function_id: str):
+def find_taskfunction_result_encoding(function_id: str) -> str:
+    return _global_result_encodings_by_function_id.get(function_id, 'json')
+
+def find_taskfunction_priority_class(function_id: str) -> str:
+    return _global_priority_classes_by_function_id.get(function_id, 'default')
+
+def taskfunction(function_id: str, *, result_encoding: str='json', priority_class: str='default'):
+    # result_encoding: 'json' (base64-encoded arrays) or 'binary' (see _binary_result.py)
+    # priority_class: see _task_scheduler.py
+    if result_encoding not in ['json', 'binary']:
+        raise Exception(f'Unexpected result encoding: {result_encoding}')
+    _check_priority_class(priority_class)
     def wrap(f: Callable[..., Any]):
         print(f'Registering task: {function_id}')
         _global_registered_taskfunctions_by_function_id[function_id] = f
+        _global_result_encodings_by_function_id[function_id] = result_encoding
+        _global_priority_classes_by_function_id[function_id] = priority_class
         return f
     return wrap
\ No newline at end of file
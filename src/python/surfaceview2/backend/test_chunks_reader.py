@@ -0,0 +1,70 @@
+import io
+
+import numpy as np
+import pytest
+
+from surfaceview2.backend._chunks_reader import _ChunksReader
+
+def _chunks():
+    rng = np.random.default_rng(0)
+    return [
+        b'header',
+        memoryview(rng.integers(0, 256, size=300000, dtype=np.uint8)),
+        b'',
+        memoryview(rng.random((1000, 3)).astype(np.float32)),
+        bytes(7)
+    ]
+
+def _joined(chunks) -> bytes:
+    return b''.join([memoryview(c).cast('B').tobytes() for c in chunks])
+
+def test_read_all():
+    chunks = _chunks()
+    assert _ChunksReader(chunks).read() == _joined(chunks)
+
+def test_resumable_upload_pattern():
+    # the resumable uploader records tell() as the start, sends fixed-size chunks, and
+    # after a failed request seeks back to the last byte confirmed by the server
+    chunks = _chunks()
+    expected = _joined(chunks)
+    f = _ChunksReader(chunks)
+    assert f.seekable()
+    start = f.tell()
+    assert start == 0
+    chunk_size = 256 * 1024
+    uploaded = b''
+    num_failures = 0
+    while True:
+        data = f.read(chunk_size)
+        if len(data) == 0:
+            break
+        if num_failures == 0 and len(uploaded) > 0:
+            # simulate a failure where the server only confirmed part of the previous request
+            num_failures = num_failures + 1
+            uploaded = uploaded[:len(uploaded) - 1000]
+            f.seek(start + len(uploaded))
+            continue
+        uploaded = uploaded + data
+        assert f.tell() == start + len(uploaded)
+    assert num_failures == 1
+    assert uploaded == expected
+
+@pytest.mark.parametrize('position', [0, 3, 6, 100000, 300006, 300006 + 12000, 300006 + 12007])
+def test_seek(position):
+    chunks = _chunks()
+    expected = _joined(chunks)
+    f = _ChunksReader(chunks)
+    assert f.seek(position) == position
+    assert f.read(5000) == expected[position:position + 5000]
+    assert f.tell() == min(position + 5000, len(expected))
+
+def test_seek_whence():
+    chunks = _chunks()
+    size = len(_joined(chunks))
+    f = _ChunksReader(chunks)
+    assert f.seek(0, io.SEEK_END) == size
+    assert f.read() == b''
+    assert f.seek(-7, io.SEEK_CUR) == size - 7
+    assert f.read() == bytes(7)
+    with pytest.raises(ValueError):
+        f.seek(-1)
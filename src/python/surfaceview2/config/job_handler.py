@@ -1,9 +1,13 @@
 import hither2 as hi
 
+# number of workers of job_handler.misc, which runs the task jobs of the backend
+# (the task scheduler never runs more task jobs than this at once)
+misc_num_workers = 4
+
 class job_handler:
     correlograms = hi.ParallelJobHandler(num_workers=4)
     timeseries = hi.ParallelJobHandler(num_workers=4)
     waveforms = hi.ParallelJobHandler(num_workers=4)
     clusters = hi.ParallelJobHandler(num_workers=4)
     metrics = hi.ParallelJobHandler(num_workers=4)
-    misc = hi.ParallelJobHandler(num_workers=4)
\ No newline at end of file
+    misc = hi.ParallelJobHandler(num_workers=misc_num_workers)
\ No newline at end of file
@@ -30,7 +30,16 @@ type SetDataAction = {
     data: any
 }
 
-type FetchCacheAction = ClearAction | StartFetchAction | SetDataAction
+type CancelFetchAction = {
+    type: 'cancelFetch',
+    queryHash: string
+}
+
+type FetchCacheAction = ClearAction | StartFetchAction | SetDataAction | CancelFetchAction
+
+// a fetch function may reject with this to indicate that the fetch was abandoned
+// (for example superseded by a newer query) and may be attempted again later
+export const fetchCanceled = {fetchCanceled: true}
 
 const fetchCacheReducer = (state: FetchCacheState, action: FetchCacheAction): FetchCacheState => {
     switch(action.type) {
@@ -59,6 +68,15 @@ const fetchCacheReducer = (state: FetchCacheState, action: FetchCacheAction): Fe
                 }
             }
         }
+        case 'cancelFetch': {
+            return {
+                ...state,
+                activeFetches: {
+                    ...state.activeFetches,
+                    [action.queryHash]: false
+                }
+            }
+        }
         default: {
             throw Error('Unexpected action in fetchCacheReducer')
         }
@@ -102,6 +120,10 @@ const useFetchCache = <QueryType>(fetchFunction: (query: QueryType) => Promise<a
                 dispatch({type: 'setData', queryHash: h, data})
             }
         }).catch((err) => {
+            if (err === fetchCanceled) {
+                dispatch({type: 'cancelFetch', queryHash: h})
+                return
+            }
             console.warn(err)
             console.warn('Problem fetching data', query)
             // note: we intentionally do not unset the active fetch here
@@ -1,5 +1,5 @@
 import React, { FunctionComponent, useMemo, useState } from 'react';
-import useFetchCache from '../../../common/useFetchCache';
+import useFetchCache, { fetchCanceled } from '../../../common/useFetchCache';
 import { TaskStatusView, useBackendProviderClient } from '../../../labbox';
 import BackendProviderClient from '../../../labbox/backendProviders/BackendProviderClient';
 import { WorkspaceModel } from '../../../pluginInterface/workspaceReducer';
@@ -38,7 +38,9 @@ const getSliceData = async (args: {client: BackendProviderClient | undefined, ve
       vector_field_3d_uri: vectorField3DUri,
       plane,
       slice_index: sliceIndex
-    }
+    },
+    // while dragging the slider only the latest slice of this field and plane is computed
+    {supersedeGroup: `get_vector_field_3d_slice_data/${vectorField3DUri}/${plane}`}
   )
   if (!task) throw Error('Unable to create get_vector_field_3d_slice_data task')
   return new Promise((resolve, reject) => {
@@ -51,7 +53,7 @@ const getSliceData = async (args: {client: BackendProviderClient | undefined, ve
         resolve(task.returnValue)
       }
       else if (task.status === 'error') {
-        reject(task.errorMessage)
+        reject(task.superseded ? fetchCanceled : task.errorMessage)
       }
     }
     task.onStatusChanged(status => check())
@@ -22,8 +22,8 @@ class BackendProviderClient {
             this.#backendInfoManager.processServerMessage(msg)
         })
     }
-    initiateTask<ReturnType>(functionId: string, kwargs: {[key: string]: any}) {
-        return this.#taskManager.initiateTask<ReturnType>(functionId, kwargs)
+    initiateTask<ReturnType>(functionId: string, kwargs: {[key: string]: any}, opts: {supersedeGroup?: string} = {}) {
+        return this.#taskManager.initiateTask<ReturnType>(functionId, kwargs, opts)
     }
     subscribeToSubfeed(opts: {feedId: FeedId, subfeedHash: SubfeedHash, onMessages: (msgs: SubfeedMessage[], messageNumber: number) => void, downloadAllMessages: boolean, position: number}) {
         return this.#subfeedManager.subscribeToSubfeed(opts)
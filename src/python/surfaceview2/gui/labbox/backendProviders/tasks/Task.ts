@@ -15,6 +15,7 @@ export type TaskQueueMessage = {
         kwargs: JSONObject
     }
     taskHash: Sha1Hash
+    supersedeGroup?: string // a newer task in the same group supersedes this one
 } | {
     type: 'keepAliveTask'
     taskHash: Sha1Hash
@@ -29,8 +30,9 @@ class Task<ReturnType> {
     #timestampCompleted: number | undefined = undefined
     #numPointers: number = 1
     #canceled: boolean = false
+    #superseded: boolean = false
     #lastKeepAliveSentTimestamp: number = Number(new Date())
-    constructor(private onPublishToTaskQueue: (message: TaskQueueMessage) => void, private objectStorageClient: ObjectStorageClient, public taskHash: Sha1Hash, public functionId: string, public kwargs: {[key: string]: any}) {
+    constructor(private onPublishToTaskQueue: (message: TaskQueueMessage) => void, private objectStorageClient: ObjectStorageClient, public taskHash: Sha1Hash, public functionId: string, public kwargs: {[key: string]: any}, supersedeGroup?: string) {
         ;(async () => {
             const returnValue = await checkForTaskReturnValue(objectStorageClient, taskHash, {deserialize: true})
             if (returnValue) {
@@ -40,7 +42,7 @@ class Task<ReturnType> {
             else {
                 console.log('initiating task')
                 const t = {functionId, kwargs}
-                onPublishToTaskQueue({type: 'initiateTask', 'task': t, taskHash})
+                onPublishToTaskQueue(supersedeGroup ? {type: 'initiateTask', 'task': t, taskHash, supersedeGroup} : {type: 'initiateTask', 'task': t, taskHash})
                 // await axios.post('/api/initiateTask', {task: , taskHash})
             }
         })()
@@ -70,6 +72,9 @@ class Task<ReturnType> {
     public get canceled() {
         return this.#canceled
     }
+    public get superseded() {
+        return this.#superseded
+    }
     public get elapsedSecSinceKeepAliveSent() {
         return (Number(new Date()) - this.#lastKeepAliveSentTimestamp) / 1000
     }
@@ -95,6 +100,14 @@ class Task<ReturnType> {
             this.#canceled = true
         }
     }
+    supersede() {
+        // a newer task in the same supersede group has been initiated (the backend cancels this one)
+        if (['error', 'finished'].includes(this.#status)) return
+        this.#superseded = true
+        this.#canceled = true
+        this._setErrorMessage('Superseded by a newer request')
+        this._setStatus('error')
+    }
     _setStatus(s: TaskStatus) {
         if (this.#status === s) return
         this.#status = s
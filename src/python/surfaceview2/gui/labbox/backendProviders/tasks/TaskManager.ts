@@ -3,26 +3,31 @@ import Task, { TaskStatus, isTaskStatus, TaskQueueMessage } from "./Task";
 import checkForTaskReturnValue from './checkForTaskReturnValue';
 import { PubsubChannel } from '../../pubsub/createPubsubClient';
 import { ObjectStorageClient } from '../../objectStorage/createObjectStorageClient';
-import { isEqualTo, isSha1Hash, isString, JSONObject, optional, Sha1Hash, sleepMsec, _validateObject } from '../../kacheryTypes';
+import { isBoolean, isEqualTo, isSha1Hash, isString, JSONObject, optional, Sha1Hash, sleepMsec, _validateObject } from '../../kacheryTypes';
 import GoogleSignInClient from '../../googleSignIn/GoogleSignInClient';
+import { randomAlphaString } from '../../objectStorage/google/GoogleObjectStorageClient';
 
 type StatusUpdateMessage = {
     type: 'taskStatusUpdate'
     taskHash: Sha1Hash
     status: TaskStatus
     error?: string
+    superseded?: boolean // the backend canceled the task because a newer task in its supersede group was requested
 }
 const isStatusUpdateMessage = (x: any): x is StatusUpdateMessage => {
     return _validateObject(x, {
         type: isEqualTo('taskStatusUpdate'),
         taskHash: isSha1Hash,
         status: isTaskStatus,
-        error: optional(isString)
+        error: optional(isString),
+        superseded: optional(isBoolean)
     })
 }
 
 class TaskManager {
     #tasks: {[key: string]: Task<any>} = {}
+    #clientId = randomAlphaString(10) // supersede groups are scoped to this client
+    #supersedeGroups: {[key: string]: Task<any>} = {}
     #onPublishToTaskQueue: (msg: TaskQueueMessage) => void
     constructor(private clientChannel: PubsubChannel, private objectStorageClient: ObjectStorageClient | null, private googleSignInClient: GoogleSignInClient | undefined) {
         this.#onPublishToTaskQueue = (msg: TaskQueueMessage) => {
@@ -31,7 +36,7 @@ class TaskManager {
         }
         this._start()
     }
-    initiateTask<ReturnType>(functionId: string, kwargs: {[key: string]: any}) {
+    initiateTask<ReturnType>(functionId: string, kwargs: {[key: string]: any}, opts: {supersedeGroup?: string} = {}) {
         if (!this.objectStorageClient) {
             console.warn('Unable to initiate task. No object storage client.')
             return undefined
@@ -42,13 +47,16 @@ class TaskManager {
             kwargs
         }
         const taskHash = sha1OfObject(taskData)
+        const supersedeGroup = opts.supersedeGroup !== undefined ? `${this.#clientId}/${opts.supersedeGroup}` : undefined
         if ((taskHash.toString() in this.#tasks) && (!this.#tasks[taskHash.toString()].canceled)) {
             const tt = this.#tasks[taskHash.toString()] as any as Task<ReturnType>
             tt.incrementNumPointers()
+            if (supersedeGroup !== undefined) this._setLatestInSupersedeGroup(supersedeGroup, tt)
             return tt
         }
-        const t = new Task<ReturnType>(this.#onPublishToTaskQueue, this.objectStorageClient, taskHash, functionId, kwargs)
+        const t = new Task<ReturnType>(this.#onPublishToTaskQueue, this.objectStorageClient, taskHash, functionId, kwargs, supersedeGroup)
         this.#tasks[taskHash.toString()] = t
+        if (supersedeGroup !== undefined) this._setLatestInSupersedeGroup(supersedeGroup, t)
         return t
     }
     processServerMessage(msg: JSONObject) {
@@ -56,6 +64,12 @@ class TaskManager {
             const taskHash = msg.taskHash
             if ((isSha1Hash(taskHash)) && (taskHash.toString() in this.#tasks && (!this.#tasks[taskHash.toString()].canceled))) {
                 const t = this.#tasks[taskHash.toString()]
+                if (msg.superseded) {
+                    // Tasks superseded here are already canceled. This one was requested again after the
+                    // backend superseded it (e.g. slider 5 -> 6 -> 5), and that newer initiateTask reaches
+                    // the backend after the supersede, so the task is queued again there.
+                    return
+                }
                 if (msg.status === 'error') {
                     t._setErrorMessage(msg.error || 'unknown')
                     t._setStatus(msg.status)
@@ -80,6 +94,11 @@ class TaskManager {
             }
         }
     }
+    _setLatestInSupersedeGroup(supersedeGroup: string, t: Task<any>) {
+        const previous = this.#supersedeGroups[supersedeGroup]
+        if ((previous) && (previous !== t)) previous.supersede()
+        this.#supersedeGroups[supersedeGroup] = t
+    }
     public get allTasks() {
         return Object.values(this.#tasks).filter(t => (!t.canceled))
     }
@@ -8,7 +8,7 @@ const checkForTaskReturnValue = async (objectStorageClient: ObjectStorageClient,
     if (!returnValue) return null
     let ret: JSONValue
     try {
-        ret = JSON.parse(new TextDecoder().decode(returnValue)) as any as JSONValue
+        ret = isBinaryResult(returnValue) ? parseBinaryResult(returnValue) : JSON.parse(new TextDecoder().decode(returnValue)) as any as JSONValue
     }
     catch(err) {
         console.warn(`Problem parsing return value for: ${path}`, returnValue)
@@ -27,4 +27,35 @@ const checkForTaskReturnValue = async (objectStorageClient: ObjectStorageClient,
     return ret
 }
 
+// Binary result container (see backend/_binary_result.py)
+//   magic (8 bytes) | header length (uint32 little endian) | header (utf-8 JSON) | padding to 8 bytes | buffers
+const binaryResultMagic = 'SV2BIN01'
+
+const isBinaryResult = (x: ArrayBuffer): boolean => {
+    if (x.byteLength < binaryResultMagic.length + 4) return false
+    return new TextDecoder().decode(x.slice(0, binaryResultMagic.length)) === binaryResultMagic
+}
+
+const parseBinaryResult = (x: ArrayBuffer): JSONValue => {
+    const headerLength = new DataView(x).getUint32(binaryResultMagic.length, true)
+    const headerStart = binaryResultMagic.length + 4
+    const header = JSON.parse(new TextDecoder().decode(x.slice(headerStart, headerStart + headerLength)))
+    const dataStart = Math.ceil((headerStart + headerLength) / 8) * 8
+    // replace the buffer references by ndarrays holding their data directly (see deserializeReturnValue)
+    const restore = (a: any): any => {
+        if ((!a) || (typeof(a) !== 'object')) return a
+        if (Array.isArray(a)) return a.map(b => restore(b))
+        if (a._type === 'ndarray_ref') {
+            const start = dataStart + a.offset
+            return {_type: 'ndarray', shape: a.shape, dtype: a.dtype, data_buffer: x.slice(start, start + a.nbytes)}
+        }
+        const ret: {[key: string]: any} = {}
+        for (let k in a) {
+            ret[k] = restore(a[k])
+        }
+        return ret
+    }
+    return restore(header) as JSONValue
+}
+
 export default checkForTaskReturnValue
\ No newline at end of file
@@ -7,8 +7,8 @@ const deserializeReturnValue = (x: any): any => {
         else if (x._type === 'ndarray') {
             const shape = x.shape as number[]
             const dtype = x.dtype as string
-            const data_b64 = x.data_b64 as string
-            const dataBuffer = _base64ToArrayBuffer(data_b64)
+            // data_buffer is set for results transferred in the binary container
+            const dataBuffer: ArrayBuffer = x.data_buffer ? x.data_buffer as ArrayBuffer : _base64ToArrayBuffer(x.data_b64 as string)
             if (dtype === 'float32') {
                 return applyShape(new Float32Array(dataBuffer), shape)
             }
@@ -18,6 +18,15 @@ const deserializeReturnValue = (x: any): any => {
             else if (dtype === 'int16') {
                 return applyShape(new Int16Array(dataBuffer), shape)
             }
+            else if (dtype === 'uint16') {
+                return applyShape(new Uint16Array(dataBuffer), shape)
+            }
+            else if (dtype === 'uint8') {
+                return applyShape(new Uint8Array(dataBuffer), shape)
+            }
+            else if (dtype === 'float16') {
+                return applyShape(_float16ToFloat32(new Uint16Array(dataBuffer)), shape)
+            }
             else {
                 throw Error(`Datatype not yet implemented for ndarray: ${dtype}`)
             }
@@ -33,7 +42,7 @@ const deserializeReturnValue = (x: any): any => {
     else return x
 }
 
-const applyShape = (x: Float32Array | Int32Array | Int16Array, shape: number[]): number[] | number[][] | number[][][] | number[][][][] | number[][][][][] => {
+const applyShape = (x: Float32Array | Int32Array | Int16Array | Uint16Array | Uint8Array, shape: number[]): number[] | number[][] | number[][][] | number[][][][] | number[][][][][] => {
     if (shape.length === 1) {
         if (shape[0] !== x.length) throw Error('Unexpected length of array')
         return Array.from(x)
@@ -113,6 +122,26 @@ const applyShape = (x: Float32Array | Int32Array | Int16Array, shape: number[]):
     }
 }
 
+const _float16ToFloat32 = (x: Uint16Array): Float32Array => {
+    const ret = new Float32Array(x.length)
+    for (let i = 0; i < x.length; i++) {
+        const h = x[i]
+        const sign = (h & 0x8000) ? -1 : 1
+        const exponent = (h >> 10) & 0x1f
+        const fraction = h & 0x3ff
+        if (exponent === 0) {
+            ret[i] = sign * Math.pow(2, -14) * (fraction / 1024)
+        }
+        else if (exponent === 0x1f) {
+            ret[i] = fraction ? NaN : sign * Infinity
+        }
+        else {
+            ret[i] = sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024)
+        }
+    }
+    return ret
+}
+
 const _base64ToArrayBuffer = (base64: string): ArrayBuffer => {
     var binary_string = window.atob(base64)
     var len = binary_string.length
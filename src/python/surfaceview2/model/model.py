@@ -33,6 +33,14 @@ class Model:
         return sorted(list(self._vectorfield3ds.keys()))
     def get_vector_field_3d(self, name: str):
         return self._vectorfield3ds[name]
+    def backfill_stats(self):
+        # returns a new Model in which every vector field has precomputed statistics
+        M = Model(label=self._label)
+        for k, v in self._surfaces.items():
+            M.add_surface(k, v)
+        for k, v in self._vectorfield3ds.items():
+            M.add_vector_field_3d(k, v.backfill_stats())
+        return M
     @staticmethod
     def deserialize(x: Union[dict, str], *, label: str):
         if isinstance(x, str):
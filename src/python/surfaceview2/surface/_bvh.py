@@ -0,0 +1,148 @@
+import numpy as np
+
+class _BVH:
+    # Linear bounding volume hierarchy over items given by their bounding boxes.
+    # Items are sorted along a Morton curve and grouped into leaves of leaf_size,
+    # the tree is a complete binary tree stored in heap order (children of i are 2i+1, 2i+2).
+    def __init__(self, item_min: np.ndarray, item_max: np.ndarray, *, leaf_size: int=16):
+        n = item_min.shape[0]
+        centers = (item_min + item_max) / 2
+        codes = _morton_code(centers)
+        order = np.argsort(codes, kind='stable')
+        num_leaves = max(1, -(-n // leaf_size))
+        depth = int(np.ceil(np.log2(num_leaves)))
+        P = 2 ** depth
+        items = np.full(P * leaf_size, -1, dtype=np.int64)
+        items[:n] = order
+        bmin = np.full((P * leaf_size, 3), np.inf)
+        bmax = np.full((P * leaf_size, 3), -np.inf)
+        bmin[:n] = item_min[order]
+        bmax[:n] = item_max[order]
+        node_min = np.empty((2 * P - 1, 3))
+        node_max = np.empty((2 * P - 1, 3))
+        node_min[P - 1:] = bmin.reshape((P, leaf_size, 3)).min(axis=1)
+        node_max[P - 1:] = bmax.reshape((P, leaf_size, 3)).max(axis=1)
+        for d in range(depth - 1, -1, -1):
+            idx = np.arange(2 ** d - 1, 2 ** (d + 1) - 1)
+            node_min[idx] = np.minimum(node_min[2 * idx + 1], node_min[2 * idx + 2])
+            node_max[idx] = np.maximum(node_max[2 * idx + 1], node_max[2 * idx + 2])
+        self.depth = depth
+        self.num_leaves = P
+        self.leaf_size = leaf_size
+        self.node_min = node_min
+        self.node_max = node_max
+        self.node_empty = np.any(node_min > node_max, axis=1)
+        self.leaf_items = items.reshape((P, leaf_size))
+        self.sorted_items = order
+        self.sorted_codes = codes[order]
+        self.code_bbox = (np.min(centers, axis=0), np.max(centers, axis=0)) if n > 0 else (np.zeros(3), np.zeros(3))
+    @property
+    def nbytes(self) -> int:
+        return sum([a.nbytes for a in [self.node_min, self.node_max, self.node_empty, self.leaf_items, self.sorted_items, self.sorted_codes]])
+    def find_leaves(self, num_queries: int, test):
+        # breadth-first traversal for all queries at once
+        # test(query_inds, node_inds) -> bool mask of the (query, node) pairs to descend into
+        # returns (query_inds, leaf_inds) of all pairs that pass the test at the leaf level
+        q = np.arange(num_queries)
+        nodes = np.zeros(num_queries, dtype=np.int64)
+        for _ in range(self.depth):
+            keep = test(q, nodes) & ~self.node_empty[nodes]
+            q = np.repeat(q[keep], 2)
+            nodes = np.stack((2 * nodes[keep] + 1, 2 * nodes[keep] + 2), axis=1).ravel()
+        keep = test(q, nodes) & ~self.node_empty[nodes]
+        return q[keep], nodes[keep] - (self.num_leaves - 1)
+
+def _morton_code(points: np.ndarray, bbox=None) -> np.ndarray:
+    # 30-bit Morton code of points quantized to 10 bits per axis within the bounding box
+    if len(points) == 0:
+        return np.zeros((0,), dtype=np.uint64)
+    pmin, pmax = bbox if bbox is not None else (np.min(points, axis=0), np.max(points, axis=0))
+    extent = np.maximum(pmax - pmin, 1e-12)
+    c = np.clip(np.floor((points - pmin) / extent * 1023), 0, 1023).astype(np.uint64)
+    ret = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(10):
+        for d in range(3):
+            ret |= ((c[:, d] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + d)
+    return ret
+
+def _first_k_per_group(groups: np.ndarray, keys: np.ndarray, k: int):
+    # indices of the k smallest keys within each group, and their rank within the group
+    order = np.lexsort((keys, groups))
+    g = groups[order]
+    starts = np.flatnonzero(np.append(True, g[1:] != g[:-1]))
+    rank = np.arange(len(g)) - np.repeat(starts, np.diff(np.append(starts, len(g))))
+    keep = rank < k
+    return order[keep], rank[keep]
+
+def _bvh_ray_pick(bvh: _BVH, vertices: np.ndarray, triangles: np.ndarray, origins: np.ndarray, directions: np.ndarray):
+    # returns (triangle index or -1, distance t along the ray) for each ray
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_dir = 1 / directions
+        def test(q, nodes):
+            t1 = (bvh.node_min[nodes] - origins[q]) * inv_dir[q]
+            t2 = (bvh.node_max[nodes] - origins[q]) * inv_dir[q]
+            tlow = np.nan_to_num(np.minimum(t1, t2), nan=-np.inf)
+            thigh = np.nan_to_num(np.maximum(t1, t2), nan=np.inf)
+            tmin = np.max(tlow, axis=1)
+            tmax = np.min(thigh, axis=1)
+            return tmax >= np.maximum(tmin, 0)
+        q, leaves = bvh.find_leaves(len(origins), test)
+    q = np.repeat(q, bvh.leaf_size)
+    tri = bvh.leaf_items[leaves].ravel()
+    valid = tri >= 0
+    q, tri = q[valid], tri[valid]
+    t = _ray_triangle_intersect(origins[q], directions[q], vertices[triangles[tri, 0]], vertices[triangles[tri, 1]], vertices[triangles[tri, 2]])
+    hit = np.isfinite(t)
+    q, tri, t = q[hit], tri[hit], t[hit]
+    ret_tri = np.full(len(origins), -1, dtype=np.int64)
+    ret_t = np.full(len(origins), np.inf)
+    inds, _ = _first_k_per_group(q, t, 1)
+    ret_tri[q[inds]] = tri[inds]
+    ret_t[q[inds]] = t[inds]
+    return ret_tri, ret_t
+
+def _ray_triangle_intersect(o, d, v0, v1, v2, eps: float=1e-12):
+    # Moller-Trumbore, vectorized over pairs; returns t (inf where there is no hit)
+    e1 = v1 - v0
+    e2 = v2 - v0
+    p = np.cross(d, e2)
+    det = np.sum(e1 * p, axis=1)
+    ok = np.abs(det) > eps
+    inv_det = np.where(ok, 1 / np.where(ok, det, 1), 0)
+    s = o - v0
+    u = np.sum(s * p, axis=1) * inv_det
+    qv = np.cross(s, e1)
+    v = np.sum(d * qv, axis=1) * inv_det
+    t = np.sum(e2 * qv, axis=1) * inv_det
+    hit = ok & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+    return np.where(hit, t, np.inf)
+
+def _bvh_nearest(bvh: _BVH, points: np.ndarray, queries: np.ndarray, k: int):
+    # k nearest points for each query; returns (indices, distances), padded with -1 / inf
+    m = len(queries)
+    n = len(points)
+    ret_inds = np.full((m, k), -1, dtype=np.int64)
+    ret_dists = np.full((m, k), np.inf)
+    if n == 0 or m == 0:
+        return ret_inds, ret_dists
+    # upper bound on the k-th distance from a window of neighbors along the Morton curve
+    pos = np.searchsorted(bvh.sorted_codes, _morton_code(queries, bvh.code_bbox))
+    w = min(max(k, bvh.leaf_size), n)
+    start = np.clip(pos - w // 2, 0, n - w)
+    window = bvh.sorted_items[start[:, None] + np.arange(w)[None, :]]
+    d2 = np.sum((points[window] - queries[:, None, :]) ** 2, axis=2)
+    kk = min(k, n)
+    r2 = np.partition(d2, kk - 1, axis=1)[:, kk - 1] * (1 + 1e-9) + 1e-30
+    def test(q, nodes):
+        delta = np.maximum(np.maximum(bvh.node_min[nodes] - queries[q], 0), queries[q] - bvh.node_max[nodes])
+        return np.sum(delta ** 2, axis=1) <= r2[q]
+    q, leaves = bvh.find_leaves(m, test)
+    q = np.repeat(q, bvh.leaf_size)
+    item = bvh.leaf_items[leaves].ravel()
+    valid = item >= 0
+    q, item = q[valid], item[valid]
+    dd = np.sum((points[item] - queries[q]) ** 2, axis=1)
+    inds, rank = _first_k_per_group(q, dd, k)
+    ret_inds[q[inds], rank] = item[inds]
+    ret_dists[q[inds], rank] = np.sqrt(dd[inds])
+    return ret_inds, ret_dists
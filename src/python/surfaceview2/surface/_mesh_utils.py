@@ -0,0 +1,67 @@
+import numpy as np
+
+def _fan_triangulate(faces: np.ndarray, ifaces: np.ndarray) -> np.ndarray:
+    # polygons given as faces (concatenated vertex indices) and ifaces (offsets into faces)
+    # returns m x 3 triangle indices, polygon (p0, p1, ..., pk) -> (p0, p1, p2), (p0, p2, p3), ...
+    ifaces = np.asarray(ifaces, dtype=np.int64)
+    counts = np.diff(np.append(ifaces, len(faces)))
+    num_triangles = np.maximum(counts - 2, 0)
+    polygon = np.repeat(np.arange(len(ifaces)), num_triangles)
+    first_triangle = np.cumsum(num_triangles) - num_triangles
+    j = np.arange(len(polygon)) - first_triangle[polygon]
+    base = ifaces[polygon]
+    return np.stack((faces[base], faces[base + j + 1], faces[base + j + 2]), axis=1)
+
+def _decimate_by_vertex_clustering(vertices: np.ndarray, triangles: np.ndarray, resolution: int):
+    # merge all vertices within each cell of a resolution^3 grid over the bounding box
+    # returns (vertices, triangles) of the simplified mesh
+    vmin = np.min(vertices, axis=0)
+    extent = float(np.max(np.max(vertices, axis=0) - vmin))
+    cell_size = max(extent, 1e-12) / resolution
+    ijk = np.minimum(np.floor((vertices - vmin) / cell_size).astype(np.int64), resolution - 1)
+    keys = (ijk[:, 0] * resolution + ijk[:, 1]) * resolution + ijk[:, 2]
+    _, cluster = np.unique(keys, return_inverse=True)
+    cluster = cluster.ravel()
+    counts = np.bincount(cluster)
+    new_vertices = np.stack([np.bincount(cluster, weights=vertices[:, d]) for d in range(3)], axis=1) / counts[:, None]
+    t = cluster[triangles]
+    # drop triangles that collapsed, then duplicates (regardless of orientation)
+    t = t[(t[:, 0] != t[:, 1]) & (t[:, 1] != t[:, 2]) & (t[:, 0] != t[:, 2])]
+    _, inds = np.unique(np.sort(t, axis=1), axis=0, return_index=True)
+    t = t[np.sort(inds)]
+    # drop vertices that are no longer referenced
+    used = np.unique(t)
+    remap = np.full(len(new_vertices), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return new_vertices[used].astype(np.float32), remap[t].astype(np.int32)
+
+def _build_lod_meshes(vertices: np.ndarray, faces: np.ndarray, ifaces: np.ndarray, *, min_num_faces: int=100):
+    # successively coarser vertex-clustering levels, each with noticeably fewer faces than the previous
+    triangles = _fan_triangulate(faces, ifaces)
+    ret = []
+    num_faces = len(ifaces)
+    resolution = 1024
+    while resolution >= 4 and num_faces > min_num_faces:
+        v, t = _decimate_by_vertex_clustering(vertices, triangles, resolution)
+        if len(t) <= 0.8 * num_faces:
+            ret.append({
+                'vertices': v,
+                'faces': t.ravel(),
+                'ifaces': np.arange(0, 3 * len(t), 3, dtype=np.int32)
+            })
+            num_faces = len(t)
+        resolution = resolution // 2
+    return ret
+
+def _compute_vertex_normals(vertices: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    # area-weighted per-vertex normals (n x 3, unit length where defined)
+    v = vertices.astype(np.float64)
+    face_normals = np.cross(v[triangles[:, 1]] - v[triangles[:, 0]], v[triangles[:, 2]] - v[triangles[:, 0]])
+    inds = triangles.ravel()
+    normals = np.stack([
+        np.bincount(inds, weights=np.repeat(face_normals[:, d], 3), minlength=len(v))
+        for d in range(3)
+    ], axis=1)
+    norms = np.linalg.norm(normals, axis=1)
+    norms[norms == 0] = 1
+    return (normals / norms[:, None]).astype(np.float32)
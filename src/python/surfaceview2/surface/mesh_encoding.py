@@ -0,0 +1,175 @@
+import zlib
+from typing import Union
+
+import numpy as np
+
+# Compact mesh transfer encoding (quantized_delta_v1)
+#  - vertices are quantized to 16 bits per coordinate within the bounding box
+#  - polygons are sorted along a Morton curve and vertices renumbered by first use,
+#    so that consecutive face indices are close together
+#  - face indices are delta encoded (zigzag) and written as LEB128 varints,
+#    polygon sizes are written as varints
+#  - the permutations (original index of each encoded vertex and polygon) are delta
+#    encoded (zigzag) and written as varints, so the original order can be restored
+#  - each byte buffer is optionally zlib compressed
+
+def encode_mesh(vertices: np.ndarray, faces: np.ndarray, ifaces: np.ndarray, *, compression: Union[str, None]='zlib') -> dict:
+    # vertices: n x 3, faces: concatenated polygon vertex indices, ifaces: polygon offsets into faces
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64)
+    ifaces = np.asarray(ifaces, dtype=np.int64)
+    num_vertices = vertices.shape[0]
+    sizes = np.diff(np.append(ifaces, len(faces)))
+
+    if num_vertices > 0:
+        bbox_min = np.min(vertices, axis=0)
+        bbox_max = np.max(vertices, axis=0)
+    else:
+        bbox_min = bbox_max = np.zeros((3,))
+    scale = _quantization_scale(bbox_min, bbox_max)
+    qvertices = np.round((vertices - bbox_min) / scale).astype(np.uint16)
+
+    # sort polygons for locality by the Morton code of their first vertex
+    order = np.arange(len(ifaces), dtype=np.int64)
+    if len(ifaces) > 0:
+        order = np.argsort(_morton_code(qvertices[faces[ifaces]]), kind='stable')
+        faces = _permute_polygons(faces, ifaces, sizes, order)
+        sizes = sizes[order]
+
+    # renumber vertices by first use, unreferenced vertices go last
+    first_use = np.full(num_vertices, len(faces), dtype=np.int64)
+    np.minimum.at(first_use, faces, np.arange(len(faces)))
+    vertex_order = np.argsort(first_use, kind='stable')
+    new_index = np.empty(num_vertices, dtype=np.int64)
+    new_index[vertex_order] = np.arange(num_vertices)
+    qvertices = qvertices[vertex_order]
+    faces = new_index[faces]
+
+    deltas = np.diff(faces, prepend=0)
+    return {
+        'encoding': 'quantized_delta_v1',
+        'compression': compression,
+        'numVertices': int(num_vertices),
+        'numFaces': int(len(sizes)),
+        'numFaceIndices': int(len(faces)),
+        'bboxMin': [float(a) for a in bbox_min],
+        'bboxMax': [float(a) for a in bbox_max],
+        'vertices': _compress(qvertices.astype('<u2').tobytes(), compression),
+        'faceSizes': _compress(_varint_encode(sizes.astype(np.uint64)), compression),
+        'faces': _compress(_varint_encode(_zigzag_encode(deltas)), compression),
+        'vertexOrder': _compress(_varint_encode(_zigzag_encode(np.diff(vertex_order, prepend=0))), compression),
+        'faceOrder': _compress(_varint_encode(_zigzag_encode(np.diff(order, prepend=0))), compression)
+    }
+
+def decode_mesh(x: dict, *, restore_order: bool=True) -> dict:
+    # reference decoder for encode_mesh, returns vertices (float32, n x 3), faces and ifaces (int32)
+    # in the original vertex and polygon order (or in the encoded order if restore_order is False)
+    if x['encoding'] != 'quantized_delta_v1':
+        raise Exception(f'Unexpected mesh encoding: {x["encoding"]}')
+    compression = x['compression']
+    num_vertices = x['numVertices']
+    bbox_min = np.array(x['bboxMin'], dtype=np.float64)
+    bbox_max = np.array(x['bboxMax'], dtype=np.float64)
+    qvertices = np.frombuffer(_decompress(x['vertices'], compression), dtype='<u2').reshape((num_vertices, 3))
+    vertices = qvertices * _quantization_scale(bbox_min, bbox_max) + bbox_min
+    sizes = _varint_decode(_decompress(x['faceSizes'], compression)).astype(np.int64)
+    faces = np.cumsum(_zigzag_decode(_varint_decode(_decompress(x['faces'], compression))))
+    if len(sizes) != x['numFaces'] or len(faces) != x['numFaceIndices']:
+        raise Exception('Unexpected number of faces when decoding mesh')
+    ifaces = np.cumsum(sizes) - sizes
+    if restore_order:
+        vertex_order = np.cumsum(_zigzag_decode(_varint_decode(_decompress(x['vertexOrder'], compression))))
+        order = np.cumsum(_zigzag_decode(_varint_decode(_decompress(x['faceOrder'], compression))))
+        if len(vertex_order) != num_vertices or len(order) != len(sizes):
+            raise Exception('Unexpected permutation size when decoding mesh')
+        original_vertices = np.empty_like(vertices)
+        original_vertices[vertex_order] = vertices
+        vertices = original_vertices
+        faces = vertex_order[faces]
+        if len(order) > 0:
+            inverse = np.empty(len(order), dtype=np.int64)
+            inverse[order] = np.arange(len(order))
+            faces = _permute_polygons(faces, ifaces, sizes, inverse)
+            sizes = sizes[inverse]
+            ifaces = np.cumsum(sizes) - sizes
+    return {
+        'vertices': vertices.astype(np.float32),
+        'faces': faces.astype(np.int32),
+        'ifaces': ifaces.astype(np.int32)
+    }
+
+def _permute_polygons(faces: np.ndarray, ifaces: np.ndarray, sizes: np.ndarray, order: np.ndarray) -> np.ndarray:
+    # concatenated vertex indices of the polygons order[0], order[1], ...
+    polygon = np.repeat(np.arange(len(ifaces)), sizes)
+    new_ifaces = np.cumsum(sizes[order]) - sizes[order]
+    rank = np.empty(len(ifaces), dtype=np.int64)
+    rank[order] = np.arange(len(ifaces))
+    position = new_ifaces[rank[polygon]] + (np.arange(len(faces)) - ifaces[polygon])
+    ret = np.empty_like(faces)
+    ret[position] = faces
+    return ret
+
+def _quantization_scale(bbox_min: np.ndarray, bbox_max: np.ndarray) -> np.ndarray:
+    scale = (bbox_max - bbox_min) / 65535
+    scale[scale == 0] = 1
+    return scale
+
+def _morton_code(q: np.ndarray) -> np.ndarray:
+    # interleave the top 10 bits of each 16-bit coordinate
+    ret = np.zeros(len(q), dtype=np.uint64)
+    c = (q >> 6).astype(np.uint64)
+    for bit in range(10):
+        for d in range(3):
+            ret |= ((c[:, d] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + d)
+    return ret
+
+def _zigzag_encode(x: np.ndarray) -> np.ndarray:
+    x = x.astype(np.int64)
+    return ((x << 1) ^ (x >> 63)).astype(np.uint64)
+
+def _zigzag_decode(z: np.ndarray) -> np.ndarray:
+    z = z.astype(np.uint64)
+    return (z >> np.uint64(1)).astype(np.int64) ^ -(z & np.uint64(1)).astype(np.int64)
+
+def _varint_encode(z: np.ndarray) -> bytes:
+    # unsigned LEB128, vectorized over all values
+    z = z.astype(np.uint64)
+    num_bytes = np.ones(len(z), dtype=np.int64)
+    for k in range(1, 10):
+        num_bytes += (z >= np.uint64(1 << (7 * k))).astype(np.int64)
+    offsets = np.cumsum(num_bytes) - num_bytes
+    out = np.zeros(int(np.sum(num_bytes)), dtype=np.uint8)
+    for k in range(int(np.max(num_bytes)) if len(z) > 0 else 0):
+        mask = num_bytes > k
+        b = (z[mask] >> np.uint64(7 * k)) & np.uint64(0x7f)
+        b = b | np.where(num_bytes[mask] > k + 1, np.uint64(0x80), np.uint64(0))
+        out[offsets[mask] + k] = b.astype(np.uint8)
+    return out.tobytes()
+
+def _varint_decode(buf: bytes) -> np.ndarray:
+    b = np.frombuffer(buf, dtype=np.uint8)
+    if len(b) == 0:
+        return np.zeros((0,), dtype=np.uint64)
+    is_last = b < 0x80
+    value_index = np.cumsum(is_last) - is_last # index of the value each byte belongs to
+    value_start = np.flatnonzero(np.append(True, is_last[:-1]))
+    shift = (7 * (np.arange(len(b)) - value_start[value_index])).astype(np.uint64)
+    parts = (b & 0x7f).astype(np.uint64) << shift
+    ret = np.zeros(int(np.sum(is_last)), dtype=np.uint64)
+    np.bitwise_or.at(ret, value_index, parts)
+    return ret
+
+def _compress(x: bytes, compression: Union[str, None]) -> np.ndarray:
+    if compression == 'zlib':
+        x = zlib.compress(x, 6)
+    elif compression is not None:
+        raise Exception(f'Unexpected compression: {compression}')
+    return np.frombuffer(x, dtype=np.uint8)
+
+def _decompress(x: np.ndarray, compression: Union[str, None]) -> bytes:
+    x = np.asarray(x, dtype=np.uint8).tobytes()
+    if compression == 'zlib':
+        return zlib.decompress(x)
+    elif compression is not None:
+        raise Exception(f'Unexpected compression: {compression}')
+    return x
@@ -1,75 +1,202 @@
-from typing import Union, cast
+from typing import List, Union, cast
 
 import kachery_p2p as kp
 import numpy as np
 from kachery_p2p.main import store_pkl
 from surfaceview2.surface.vtk_to_mesh_dict import vtk_to_mesh_dict
+from .._array_store import _cached, _load_json, _load_npy_mmap, _load_pkl, _object_key, _store_npy
+from ._bvh import _BVH, _bvh_nearest, _bvh_ray_pick
+from ._mesh_utils import _build_lod_meshes, _compute_vertex_normals, _fan_triangulate
 
 
 class Surface:
     def __init__(self, arg: Union[dict, str]):
         if isinstance(arg, str):
-            x = kp.load_json(arg)
-            if not x:
-                raise Exception(f'Unable to load: {arg}')
-            arg = cast(dict, x)
-        self._load(arg)
+            arg = cast(dict, _load_json(arg))
         self._arg = arg
+        self._loaded = False # arrays are loaded on first access
     def serialize(self):
         return self._arg
     @property
     def vertices(self) -> np.ndarray: # n x 3
+        self._ensure_loaded()
         return self._vertices
     @property
-    def num_vertices(self):
-        return self.vertices.shape[1]
+    def num_vertices(self) -> int:
+        data = self._arg.get('data', {})
+        if 'num_vertices' in data:
+            return int(data['num_vertices'])
+        return self.vertices.shape[0]
     @property
-    def num_faces(self):
+    def num_faces(self) -> int:
+        data = self._arg.get('data', {})
+        if 'num_faces' in data:
+            return int(data['num_faces'])
         return len(self.ifaces)
     @property
     def faces(self) -> np.ndarray:
+        self._ensure_loaded()
         return self._faces
     @property
     def ifaces(self) -> np.ndarray:
+        self._ensure_loaded()
         return self._ifaces
+    @property
+    def triangles(self) -> np.ndarray: # m x 3
+        # fan triangulation of the polygons, precomputed at creation or computed once and cached
+        return self._get_triangle_buffers()['triangles']
+    @property
+    def vertex_normals(self) -> np.ndarray: # n x 3
+        return self._get_triangle_buffers()['normals']
+    def _get_triangle_buffers(self) -> dict:
+        data = self._arg.get('data', {})
+        if 'triangles_uri' in data:
+            return {
+                'triangles': _load_npy_mmap(data['triangles_uri']),
+                'normals': _load_npy_mmap(data['normals_uri'])
+            }
+        key = f'surface_triangles:{_object_key(self._arg)}'
+        return _cached(key, lambda: _compute_triangle_buffers(self.vertices, self.faces, self.ifaces))
+    def pick(self, origins: np.ndarray, directions: np.ndarray, *, chunk_size: int=4096) -> dict:
+        # first face hit by each ray (origins, directions: m x 3), -1 where there is no hit
+        origins = np.asarray(origins, dtype=np.float64).reshape((-1, 3))
+        directions = np.asarray(directions, dtype=np.float64).reshape((-1, 3))
+        x = self._get_triangle_bvh()
+        vertices = np.asarray(self.vertices, dtype=np.float64)
+        triangles = self.triangles
+        face_indices = np.full(len(origins), -1, dtype=np.int64)
+        t = np.full(len(origins), np.inf)
+        for i in range(0, len(origins), chunk_size):
+            tri, t0 = _bvh_ray_pick(x['bvh'], vertices, triangles, origins[i:i + chunk_size], directions[i:i + chunk_size])
+            face_indices[i:i + chunk_size] = np.where(tri >= 0, x['triangle_faces'][tri], -1)
+            t[i:i + chunk_size] = t0
+        return {'face_indices': face_indices, 't': t}
+    def nearest_vertices(self, points: np.ndarray, *, k: int=1, chunk_size: int=4096) -> dict:
+        # k nearest vertices to each point (m x 3), padded with -1 / inf if there are fewer than k vertices
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        bvh = self._get_vertex_bvh()
+        vertices = np.asarray(self.vertices, dtype=np.float64)
+        inds = np.full((len(points), k), -1, dtype=np.int64)
+        dists = np.full((len(points), k), np.inf)
+        for i in range(0, len(points), chunk_size):
+            inds[i:i + chunk_size], dists[i:i + chunk_size] = _bvh_nearest(bvh, vertices, points[i:i + chunk_size], k)
+        return {'vertex_indices': inds, 'distances': dists}
+    def _get_triangle_bvh(self) -> dict:
+        # built lazily and cached (see _array_store._cached)
+        def build():
+            vertices = np.asarray(self.vertices, dtype=np.float64)
+            corners = vertices[self.triangles]
+            counts = np.diff(np.append(self.ifaces, len(self.faces)))
+            return {
+                'bvh': _BVH(np.min(corners, axis=1), np.max(corners, axis=1)),
+                'triangle_faces': np.repeat(np.arange(len(counts)), np.maximum(counts - 2, 0))
+            }
+        return _cached(f'surface_triangle_bvh:{_object_key(self._arg)}', build)
+    def _get_vertex_bvh(self) -> _BVH:
+        def build():
+            vertices = np.asarray(self.vertices, dtype=np.float64)
+            return _BVH(vertices, vertices)
+        return _cached(f'surface_vertex_bvh:{_object_key(self._arg)}', build)
+    def get_lods(self) -> List['Surface']:
+        # level-of-detail meshes, from finest to coarsest (not including this surface)
+        data = self._arg.get('data', {})
+        if 'lods' in data:
+            return [Surface(x) for x in data['lods']]
+        lods = _cached(f'surface_lods:{_object_key(self._arg)}', lambda: _build_lod_meshes(self.vertices, self.faces, self.ifaces))
+        source = _object_key(self._arg)
+        return [_InMemorySurface(**x, source=source, lod=i) for i, x in enumerate(lods)]
+    def get_lod(self, target_num_faces: int) -> 'Surface':
+        # the finest level of detail with at most target_num_faces faces (or the coarsest available)
+        if self.num_faces <= target_num_faces:
+            return self
+        lods = self.get_lods()
+        for L in lods:
+            if L.num_faces <= target_num_faces:
+                return L
+        return lods[-1] if len(lods) > 0 else self
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load(self._arg)
+            self._loaded = True
     def _load(self, arg: dict):
         format = arg.get('surface_format')
         data = arg.get('data', {})
         if format == 'pkl_v1':
-            pkl_uri = data['pkl_uri']
-            x = kp.load_pkl(pkl_uri)
-            if x is None:
-                raise Exception(f'Unable to load: {pkl_uri}')
+            x = _load_pkl(data['pkl_uri'])
             self._vertices = x['vertices']
             self._faces = x['faces']
             self._ifaces = x['ifaces']
+        elif format == 'npy_v1':
+            self._vertices = _load_npy_mmap(data['vertices_uri'])
+            self._faces = _load_npy_mmap(data['faces_uri'])
+            self._ifaces = _load_npy_mmap(data['ifaces_uri'])
         else:
             raise Exception(f'Unexpected surface format: {format}')
     @staticmethod
-    def from_numpy(*, vertices: np.ndarray, faces: np.ndarray, ifaces: np.ndarray):
+    def from_numpy(*, vertices: np.ndarray, faces: np.ndarray, ifaces: np.ndarray, surface_format: str='npy_v1', lods: bool=False, triangles: bool=False):
         # vertices: n x 3
         # faces: m
         # ifaces: k
         print(vertices.shape)
         assert vertices.shape[1] == 3
+        vertices = vertices.astype(np.float32, copy=False)
+        faces = faces.astype(np.int32, copy=False)
+        ifaces = ifaces.astype(np.int32, copy=False)
+        data = {
+            'num_vertices': vertices.shape[0],
+            'num_faces': len(ifaces)
+        }
+        if surface_format == 'pkl_v1':
+            data['pkl_uri'] = kp.store_pkl({
+                'vertices': vertices,
+                'faces': faces,
+                'ifaces': ifaces
+            })
+        elif surface_format == 'npy_v1':
+            # each array is a raw .npy file that is memory-mapped on load
+            data['vertices_uri'] = _store_npy(vertices)
+            data['faces_uri'] = _store_npy(faces)
+            data['ifaces_uri'] = _store_npy(ifaces)
+        else:
+            raise Exception(f'Unexpected surface format: {surface_format}')
+        if triangles:
+            # render-ready triangle index buffer and per-vertex normals
+            x = _compute_triangle_buffers(vertices, faces, ifaces)
+            data['triangles_uri'] = _store_npy(x['triangles'])
+            data['normals_uri'] = _store_npy(x['normals'])
+        if lods:
+            # precomputed level-of-detail meshes, stored in the same format
+            data['lods'] = [
+                Surface.from_numpy(**x, surface_format=surface_format).serialize()
+                for x in _build_lod_meshes(vertices, faces, ifaces)
+            ]
         return Surface({
-            'surface_format': 'pkl_v1',
-            'data': {
-                'num_vertices': vertices.shape[0],
-                'num_faces': len(ifaces),
-                'pkl_uri': kp.store_pkl({
-                    'vertices': vertices.astype(np.float32),
-                    'faces': faces.astype(np.int32),
-                    'ifaces': ifaces.astype(np.int32)
-                })
-            }
+            'surface_format': surface_format,
+            'data': data
         })
     @staticmethod
     def from_vtk_unstructured_grid(vtk_uri: str):
         vtk_path = kp.load_file(vtk_uri)
         if vtk_path is None: raise Exception(f'Unable to load file: {vtk_uri}')
         x = vtk_to_mesh_dict(vtk_path, format='UnstructuredGrid', base64=False)
-        vertices = np.array(x['vertices'], dtype=np.float32).T
-        faces = np.array(x['faces'], dtype=np.int32)
-        ifaces = np.array(x['ifaces'], dtype=np.int32)
-        return Surface.from_numpy(vertices=vertices, faces=faces, ifaces=ifaces)
\ No newline at end of file
+        vertices = x['vertices'].T # n x 3
+        faces = x['faces']
+        ifaces = x['ifaces']
+        return Surface.from_numpy(vertices=vertices, faces=faces, ifaces=ifaces)
+
+def _compute_triangle_buffers(vertices: np.ndarray, faces: np.ndarray, ifaces: np.ndarray) -> dict:
+    triangles = _fan_triangulate(faces, ifaces).astype(np.int32)
+    return {
+        'triangles': triangles,
+        'normals': _compute_vertex_normals(vertices, triangles)
+    }
+
+class _InMemorySurface(Surface):
+    # a Surface whose arrays are held in memory rather than in kachery (used for cached LOD meshes)
+    # source and lod identify the mesh, since the descriptor is the key of its derived data in the cache (see _array_store._cached)
+    def __init__(self, *, vertices: np.ndarray, faces: np.ndarray, ifaces: np.ndarray, source: str, lod: int):
+        super().__init__({'surface_format': 'in_memory', 'source': source, 'lod': lod, 'data': {'num_vertices': vertices.shape[0], 'num_faces': len(ifaces)}})
+        self._vertices = vertices
+        self._faces = faces
+        self._ifaces = ifaces
+        self._loaded = True
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from surfaceview2.surface.mesh_encoding import decode_mesh, encode_mesh
+
+def _grid_mesh(n: int):
+    # n x n grid of vertices on a wavy surface, with (n - 1)^2 quads
+    x, y = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+    vertices = np.stack([x.ravel(), y.ravel(), np.sin(x.ravel() / 10) * 3], axis=1).astype(np.float64)
+    idx = np.arange(n * n).reshape((n, n))
+    quads = np.stack([idx[:-1, :-1], idx[1:, :-1], idx[1:, 1:], idx[:-1, 1:]], axis=-1).reshape((-1, 4))
+    faces = quads.ravel()
+    ifaces = np.arange(0, len(faces), 4)
+    return vertices, faces, ifaces
+
+def _encoded_size(x: dict) -> int:
+    return sum([len(x[k]) for k in ['vertices', 'faceSizes', 'faces', 'vertexOrder', 'faceOrder']])
+
+def _check_round_trip(vertices, faces, ifaces, compression):
+    x = encode_mesh(vertices, faces, ifaces, compression=compression)
+    y = decode_mesh(x)
+    vertices = np.asarray(vertices, dtype=np.float64).reshape((-1, 3))
+    extent = np.max(vertices, axis=0) - np.min(vertices, axis=0) if len(vertices) > 0 else np.zeros((3,))
+    tol = np.maximum(extent / 65535, 1e-6)
+    assert y['vertices'].shape == vertices.shape
+    assert np.all(np.abs(y['vertices'] - vertices) <= tol)
+    np.testing.assert_array_equal(y['faces'], faces)
+    np.testing.assert_array_equal(y['ifaces'], ifaces)
+    return x
+
+@pytest.mark.parametrize('compression', ['zlib', None])
+def test_empty_mesh(compression):
+    x = _check_round_trip(np.zeros((0, 3)), np.zeros((0,), dtype=np.int64), np.zeros((0,), dtype=np.int64), compression)
+    assert x['numVertices'] == 0
+    assert x['numFaces'] == 0
+
+@pytest.mark.parametrize('compression', ['zlib', None])
+def test_mixed_polygon_sizes(compression):
+    rng = np.random.default_rng(0)
+    vertices = rng.random((200, 3)) * 100
+    sizes = rng.integers(3, 8, size=150)
+    faces = rng.integers(0, 180, size=int(np.sum(sizes))) # the last vertices are unreferenced
+    ifaces = np.cumsum(sizes) - sizes
+    _check_round_trip(vertices, faces, ifaces, compression)
+
+def test_encoded_order():
+    vertices, faces, ifaces = _grid_mesh(20)
+    x = encode_mesh(vertices, faces, ifaces)
+    y = decode_mesh(x, restore_order=False)
+    # same polygons, renumbered and reordered
+    vertex_sets = sorted([tuple(sorted(np.round(vertices[faces[i:i + 4]]).astype(int).ravel())) for i in ifaces])
+    y_faces, y_vertices = y['faces'], np.round(y['vertices']).astype(int)
+    y_vertex_sets = sorted([tuple(sorted(y_vertices[y_faces[i:i + 4]].ravel())) for i in y['ifaces']])
+    assert vertex_sets == y_vertex_sets
+
+def test_degenerate_bbox_axis():
+    # flat mesh: zero extent in z
+    vertices, faces, ifaces = _grid_mesh(10)
+    vertices[:, 2] = 5
+    _check_round_trip(vertices, faces, ifaces, 'zlib')
+    # a single vertex: zero extent in all axes
+    _check_round_trip(np.array([[1.5, -2, 3]]), np.zeros((0,), dtype=np.int64), np.zeros((0,), dtype=np.int64), 'zlib')
+
+def test_grid_mesh_size():
+    vertices, faces, ifaces = _grid_mesh(200)
+    x = _check_round_trip(vertices, faces, ifaces, 'zlib')
+    raw_size = vertices.astype(np.float32).nbytes + faces.astype(np.int32).nbytes + ifaces.astype(np.int32).nbytes
+    assert raw_size >= 4 * _encoded_size(x)
@@ -2,7 +2,6 @@ def vtk_to_mesh_dict(vtk_path: str, format: str, base64: bool=False) -> dict:
     import numpy as np
     from vtk.util.numpy_support import vtk_to_numpy
     from vtk import vtkUnstructuredGridReader, vtkXMLPolyDataReader
-    from vtk.numpy_interface import dataset_adapter as dsa
     from surfaceview2.backend._serialize import _serialize
 
     if format == 'UnstructuredGrid':
@@ -14,32 +13,74 @@ def vtk_to_mesh_dict(vtk_path: str, format: str, base64: bool=False) -> dict:
     reader.SetFileName(vtk_path)
     reader.Update()
     X = reader.GetOutput()
-    Y = dsa.WrapDataObject(X)
 
-    vertices0 = vtk_to_numpy(Y.Points) # 3 x n
-    vertices = vertices0.T.tolist()
+    vertices0 = vtk_to_numpy(X.GetPoints().GetData()) # n x 3
+    vertices = vertices0.T # 3 x n
     if format == 'XMLPolyData':
-        faces0 = vtk_to_numpy(Y.Polygons)
+        cell_array = X.GetPolys()
     else:
-        faces0 = vtk_to_numpy(Y.Cells)
-    ifaces = []
-    faces = []
-    i = 0
-    while i < len(faces0):
-        num_points = faces0[i]
-        i = i + 1
-        ifaces.append(len(faces))
-        for j in range(num_points):
-            faces.append(int(faces0[i]))
-            i = i + 1
+        cell_array = X.GetCells()
+    if hasattr(cell_array, 'GetOffsetsArray'):
+        # VTK >= 9 stores offsets and connectivity separately
+        offsets = vtk_to_numpy(cell_array.GetOffsetsArray())
+        faces = vtk_to_numpy(cell_array.GetConnectivityArray())
+        ifaces = offsets[:-1]
+    else:
+        # legacy layout: [n0, p..., n1, p..., ...]
+        faces0 = vtk_to_numpy(cell_array.GetData())
+        if format == 'UnstructuredGrid':
+            locations = vtk_to_numpy(X.GetCellLocationsArray())
+        else:
+            locations = _legacy_cell_locations(faces0, cell_array.GetNumberOfCells())
+        faces, ifaces = _decode_legacy_cell_array(faces0, locations)
+    faces = faces.astype(np.int32, copy=False)
+    ifaces = ifaces.astype(np.int32, copy=False)
 
     if base64:
-        vertices = _serialize(np.array(vertices, dtype=np.float32))
-        ifaces = _serialize(np.array(ifaces, dtype=np.int32))
-        faces = _serialize(np.array(faces, dtype=np.int32))
+        vertices = _serialize(vertices.astype(np.float32))
+        ifaces = _serialize(ifaces)
+        faces = _serialize(faces)
 
     return {
         'vertices': vertices,
         'ifaces': ifaces,
         'faces': faces
     }
+
+def _decode_legacy_cell_array(faces0, locations):
+    import numpy as np
+    # locations are the positions of the per-cell point counts within faces0
+    locations = locations.astype(np.int64, copy=False)
+    mask = np.ones(len(faces0), dtype=bool)
+    mask[locations] = False
+    faces = faces0[mask]
+    ifaces = locations - np.arange(len(locations), dtype=np.int64)
+    return faces, ifaces
+
+def _legacy_cell_locations(faces0, num_cells: int):
+    import numpy as np
+    n = len(faces0)
+    if num_cells == 0 or n == 0:
+        return np.zeros((0,), dtype=np.int64)
+    # fast path: every cell has the same number of points (e.g. all triangles)
+    c = int(faces0[0])
+    if n == num_cells * (c + 1):
+        locations = np.arange(0, n, c + 1, dtype=np.int64)
+        if np.all(faces0[locations] == c):
+            return locations
+    # general case: the position following entry i (if it is a count) is i + faces0[i] + 1.
+    # Collect the orbit of 0 under this map by pointer doubling, O(n log num_cells).
+    jump = np.arange(n, dtype=np.int64) + faces0.astype(np.int64) + 1
+    jump = np.minimum(jump, n) # n is a sink
+    jump = np.append(jump, n)
+    reached = np.zeros(n + 1, dtype=bool)
+    reached[0] = True
+    steps = 1
+    while steps < num_cells:
+        reached[jump[reached]] = True
+        jump = jump[jump]
+        steps = steps * 2
+    locations = np.nonzero(reached[:n])[0]
+    if len(locations) != num_cells:
+        raise Exception(f'Unexpected number of cells in cell array: {len(locations)} <> {num_cells}')
+    return locations
@@ -4,5 +4,13 @@ from .get_model_info import *
 from .get_surface_data import *
 from .get_vector_field_3d_info import *
 from .get_vector_field_3d_slice_data import *
+from .get_vector_field_3d_slices_data import *
+from .get_vector_field_3d_oblique_slice_data import *
+from .pick_surface_faces import *
+from .get_surface_nearest_vertices import *
+from .probe_vector_field_3d import *
+from .get_surface_vector_field_samples import *
+from .extract_vector_field_3d_isosurface import *
+from .get_vector_field_3d_histogram import *
 
 # jinjaroot synctool exclude
\ No newline at end of file
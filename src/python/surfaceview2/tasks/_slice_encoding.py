@@ -0,0 +1,36 @@
+from typing import List, Union
+import numpy as np
+
+def _encode_slice_values(a: np.ndarray, *, components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32') -> dict:
+    # a: component x ... (complex)
+    # quantity: 'complex' (real/imag x component x ...), or 'real', 'imag', 'magnitude', 'phase' (component x ...)
+    # precision: 'float32', 'float16', or 'uint8'/'uint16' quantized with values ~= q * scale + offset,
+    #   where the top code (invalidValue) marks non-finite values (e.g. samples outside the grid)
+    if components is not None:
+        a = a[components]
+    if quantity == 'complex':
+        x = np.stack((a.real, a.imag))
+    elif quantity == 'real':
+        x = a.real
+    elif quantity == 'imag':
+        x = a.imag
+    elif quantity == 'magnitude':
+        x = np.abs(a)
+    elif quantity == 'phase':
+        x = np.angle(a)
+    else:
+        raise Exception(f'Unexpected quantity: {quantity}')
+    if precision in ['float32', 'float16']:
+        return {'values': x.astype(precision)}
+    elif precision in ['uint8', 'uint16']:
+        num_levels = 2 ** (8 if precision == 'uint8' else 16)
+        finite = np.isfinite(x)
+        offset = float(np.min(x[finite])) if np.any(finite) else 0.0
+        max0 = float(np.max(x[finite])) if np.any(finite) else 0.0
+        invalid_value = num_levels - 1
+        scale = (max0 - offset) / (num_levels - 2) if max0 > offset else 1.0
+        q = np.round((np.where(finite, x, offset) - offset) / scale)
+        q[~finite] = invalid_value
+        return {'values': q.astype(precision), 'scale': scale, 'offset': offset, 'invalidValue': invalid_value}
+    else:
+        raise Exception(f'Unexpected precision: {precision}')
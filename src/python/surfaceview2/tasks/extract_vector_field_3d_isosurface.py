@@ -0,0 +1,21 @@
+from typing import Union
+import hither2 as hi
+import kachery_p2p as kp
+import surfaceview2
+from ..backend import taskfunction
+from surfaceview2.config import job_cache, job_handler
+
+@hi.function('extract_vector_field_3d_isosurface', '0.1.0')
+def extract_vector_field_3d_isosurface(vector_field_3d_uri: str, threshold: float, quantity: str='magnitude', component: Union[int, None]=None):
+    V = surfaceview2.VectorField3D(vector_field_3d_uri)
+    S = V.extract_isosurface(threshold, quantity=quantity, component=component)
+    return {
+        'surfaceUri': kp.store_json(S.serialize()),
+        'numVertices': S.num_vertices,
+        'numFaces': S.num_faces
+    }
+
+@taskfunction('extract_vector_field_3d_isosurface.1', result_encoding='binary')
+def task_extract_vector_field_3d_isosurface(vector_field_3d_uri: str, threshold: float, quantity: str='magnitude', component: Union[int, None]=None):
+    with hi.Config(job_handler=job_handler.misc, job_cache=job_cache):
+        return hi.Job(extract_vector_field_3d_isosurface, {'vector_field_3d_uri': vector_field_3d_uri, 'threshold': threshold, 'quantity': quantity, 'component': component})
@@ -6,7 +6,7 @@ from ..backend import taskfunction
 from surfaceview2.config import job_cache, job_handler
 from surfaceview2.workspace_list import WorkspaceList
 
-@hi.function('get_model_info', '0.1.8')
+@hi.function('get_model_info', '0.1.10')
 def get_model_info(model_uri: str):
     model_object = kp.load_json(model_uri)
     if not model_object:
@@ -27,15 +27,15 @@ def get_model_info(model_uri: str):
         v = E.get_vector_field_3d(name)
         ret['vectorfield3ds'][name] = {
             'uri': kp.store_json(v.serialize()),
-            'nx': len(v.xgrid),
-            'ny': len(v.ygrid),
-            'nz': len(v.zgrid),
-            'dim': v.values.shape[0],
-            'valueRange': {'min': np.min(v.values.real), 'max': np.max(v.values.real)}
+            'nx': v.nx,
+            'ny': v.ny,
+            'nz': v.nz,
+            'dim': v.dim,
+            'valueRange': {'min': v.stats['real_min'], 'max': v.stats['real_max']}
         }
     return ret
 
-@taskfunction('get_model_info.8')
+@taskfunction('get_model_info.8', priority_class='model_info')
 def task_get_model_info(model_uri: str):
     with hi.Config(job_handler=job_handler.misc, job_cache=job_cache):
         return hi.Job(get_model_info, {'model_uri': model_uri})
\ No newline at end of file
@@ -1,21 +1,41 @@
+from typing import Union
 import numpy as np
 import hither2 as hi
 import kachery_p2p as kp
 import surfaceview2
 from ..backend import taskfunction
+from ..surface.mesh_encoding import encode_mesh
 from surfaceview2.config import job_cache, job_handler
 from surfaceview2.workspace_list import WorkspaceList
 
-@hi.function('get_surface_data', '0.1.2')
-def get_surface_data(surface_uri: str):
+@hi.function('get_surface_data', '0.1.6')
+def get_surface_data(surface_uri: str, target_num_faces: Union[int, None]=None, triangulate: bool=False, encoding: Union[str, None]=None, compression: Union[str, None]='zlib'):
     S = surfaceview2.Surface(surface_uri)
+    if target_num_faces is not None:
+        # serve a decimated level of detail within the face budget
+        S = S.get_lod(target_num_faces)
+    if encoding == 'quantized_delta_v1':
+        # compact transfer encoding, see surface/mesh_encoding.py for the reference decoder
+        return encode_mesh(S.vertices, S.faces, S.ifaces, compression=compression)
+    elif encoding is not None:
+        raise Exception(f'Unexpected encoding: {encoding}')
+    if triangulate:
+        # render-ready triangles with per-vertex normals
+        return dict({
+            'vertices': S.vertices.astype(np.float32, copy=False),
+            'triangles': S.triangles.astype(np.int32, copy=False),
+            'normals': S.vertex_normals.astype(np.float32, copy=False)
+        })
     return dict({
-        'vertices': S.vertices.astype(np.float32),
-        'faces': S.faces.astype(np.int32),
-        'ifaces': S.ifaces.astype(np.int32)
+        'vertices': S.vertices.astype(np.float32, copy=False),
+        'faces': S.faces.astype(np.int32, copy=False),
+        'ifaces': S.ifaces.astype(np.int32, copy=False)
     })
 
-@taskfunction('get_surface_data.6')
-def task_get_surface_data(surface_uri: str):
+@taskfunction('get_surface_data.6', result_encoding='binary', priority_class='surface')
+def task_get_surface_data(surface_uri: str, target_num_faces: Union[int, None]=None, triangulate: bool=False, encoding: Union[str, None]=None, compression: Union[str, None]='zlib'):
     with hi.Config(job_handler=job_handler.misc, job_cache=None):
-        return hi.Job(get_surface_data, {'surface_uri': surface_uri})
\ No newline at end of file
+        return hi.Job(get_surface_data, {
+            'surface_uri': surface_uri, 'target_num_faces': target_num_faces, 'triangulate': triangulate,
+            'encoding': encoding, 'compression': compression
+        })
\ No newline at end of file
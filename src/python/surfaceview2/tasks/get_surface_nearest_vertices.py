@@ -0,0 +1,20 @@
+from typing import List
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from surfaceview2.config import job_cache, job_handler
+
+@hi.function('get_surface_nearest_vertices', '0.1.0')
+def get_surface_nearest_vertices(surface_uri: str, points: List[List[float]], k: int):
+    S = surfaceview2.Surface(surface_uri)
+    x = S.nearest_vertices(np.array(points, dtype=np.float64).reshape((-1, 3)), k=k)
+    return {
+        'vertexIndices': x['vertex_indices'].astype(np.int32), # m x k, -1 where there are fewer than k vertices
+        'distances': np.where(x['vertex_indices'] >= 0, x['distances'], -1).astype(np.float32)
+    }
+
+@taskfunction('get_surface_nearest_vertices.1', priority_class='interactive')
+def task_get_surface_nearest_vertices(surface_uri: str, points: List[List[float]], k: int=1):
+    with hi.Config(job_handler=job_handler.misc, job_cache=None):
+        return hi.Job(get_surface_nearest_vertices, {'surface_uri': surface_uri, 'points': points, 'k': k})
@@ -0,0 +1,34 @@
+from typing import List, Union
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from .._array_store import _cached, _object_key
+from ._slice_encoding import _encode_slice_values
+from surfaceview2.config import job_cache, job_handler
+
+@hi.function('get_surface_vector_field_samples', '0.1.1')
+def get_surface_vector_field_samples(
+    surface_uri: str, vector_field_3d_uri: str,
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
+    S = surfaceview2.Surface(surface_uri)
+    V = surfaceview2.VectorField3D(vector_field_3d_uri)
+    # the interpolated samples are cached by the content of both descriptors,
+    # so that different output encodings do not resample
+    key = f'surface_vector_field_samples:{_object_key(S.serialize())}:{_object_key(V.serialize())}'
+    # dim x num_vertices, nan outside the grid
+    a = _cached(key, lambda: V.probe(np.asarray(S.vertices, dtype=np.float64)))
+    return _encode_slice_values(a, components=components, quantity=quantity, precision=precision)
+
+@taskfunction('get_surface_vector_field_samples.1', priority_class='surface')
+def task_get_surface_vector_field_samples(
+    surface_uri: str, vector_field_3d_uri: str,
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
+    # the job cache is keyed by the (content-addressed) URIs
+    with hi.Config(job_handler=job_handler.misc, job_cache=job_cache):
+        return hi.Job(get_surface_vector_field_samples, {
+            'surface_uri': surface_uri, 'vector_field_3d_uri': vector_field_3d_uri,
+            'components': components, 'quantity': quantity, 'precision': precision
+        })
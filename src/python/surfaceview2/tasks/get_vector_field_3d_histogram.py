@@ -0,0 +1,32 @@
+from typing import List, Union
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from surfaceview2.config import job_cache, job_handler
+
+@hi.function('get_vector_field_3d_histogram', '0.1.0')
+def get_vector_field_3d_histogram(vector_field_3d_uri: str, quantity: str, component: Union[int, None], num_bins: int, percentiles: List[float]):
+    V = surfaceview2.VectorField3D(vector_field_3d_uri)
+    x = V.get_histogram(quantity=quantity, component=component, num_bins=num_bins, percentiles=percentiles)
+    return {
+        'min': x['min'],
+        'max': x['max'],
+        'binEdges': x['bin_edges'].astype(np.float32),
+        'counts': x['counts'].astype(np.int32),
+        'percentiles': [{'percentile': p, 'value': float(v)} for p, v in zip(percentiles, x['percentiles'])]
+    }
+
+@taskfunction('get_vector_field_3d_histogram.1')
+def task_get_vector_field_3d_histogram(
+    vector_field_3d_uri: str, quantity: str='real', component: Union[int, None]=None,
+    num_bins: int=256, percentiles: Union[List[float], None]=None
+):
+    if percentiles is None:
+        percentiles = [1, 5, 50, 95, 99]
+    # cached by the (content-addressed) field URI
+    with hi.Config(job_handler=job_handler.misc, job_cache=job_cache):
+        return hi.Job(get_vector_field_3d_histogram, {
+            'vector_field_3d_uri': vector_field_3d_uri, 'quantity': quantity, 'component': component,
+            'num_bins': num_bins, 'percentiles': percentiles
+        })
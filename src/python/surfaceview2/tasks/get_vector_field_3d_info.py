@@ -13,7 +13,7 @@ def get_vector_field_3d_info(vector_field_3d_uri: str):
         'xgrid': V.xgrid.astype(np.float32),
         'ygrid': V.ygrid.astype(np.float32),
         'zgrid': V.zgrid.astype(np.float32),
-        'dim': V.values.shape[0]
+        'dim': V.dim
     })
 
 @taskfunction('get_vector_field_3d_info.1')
@@ -0,0 +1,44 @@
+from typing import List, Union
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from ._slice_encoding import _encode_slice_values
+from surfaceview2.config import job_cache, job_handler
+
+# bounds on the requested sampling grid (the result has dim x n1 x n2 complex values)
+max_oblique_slice_resolution = 4096
+max_oblique_slice_num_samples = 2048 * 2048
+
+@hi.function('get_vector_field_3d_oblique_slice_data', '0.1.1')
+def get_vector_field_3d_oblique_slice_data(
+    vector_field_3d_uri: str, origin: List[float], axis1: List[float], axis2: List[float], resolution: List[int],
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
+    # the plane is origin + s * axis1 + t * axis2 for s, t in [0, 1], sampled on a resolution[0] x resolution[1] grid
+    n1, n2 = _check_resolution(resolution)
+    V = surfaceview2.VectorField3D(vector_field_3d_uri)
+    a = V.get_oblique_slice(np.array(origin), np.array(axis1), np.array(axis2), n1, n2)
+    return _encode_slice_values(a, components=components, quantity=quantity, precision=precision)
+
+@taskfunction('get_vector_field_3d_oblique_slice_data.1', result_encoding='binary', priority_class='interactive')
+def task_get_vector_field_3d_oblique_slice_data(
+    vector_field_3d_uri: str, origin: List[float], axis1: List[float], axis2: List[float], resolution: List[int],
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
+    _check_resolution(resolution) # reject when the scheduler starts the task, before the job goes to a worker
+    with hi.Config(job_handler=job_handler.misc, job_cache=None):
+        return hi.Job(get_vector_field_3d_oblique_slice_data, {
+            'vector_field_3d_uri': vector_field_3d_uri, 'origin': origin, 'axis1': axis1, 'axis2': axis2, 'resolution': resolution,
+            'components': components, 'quantity': quantity, 'precision': precision
+        })
+
+def _check_resolution(resolution: List[int]):
+    if len(resolution) != 2:
+        raise Exception(f'Invalid resolution: {resolution}')
+    n1, n2 = resolution
+    if (int(n1) != n1) or (int(n2) != n2) or (n1 < 1) or (n2 < 1) or (n1 > max_oblique_slice_resolution) or (n2 > max_oblique_slice_resolution):
+        raise Exception(f'Invalid resolution: {resolution} (at most {max_oblique_slice_resolution} per axis)')
+    if n1 * n2 > max_oblique_slice_num_samples:
+        raise Exception(f'Resolution too large: {resolution} (at most {max_oblique_slice_num_samples} samples)')
+    return int(n1), int(n2)
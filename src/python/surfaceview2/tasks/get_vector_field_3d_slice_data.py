@@ -1,25 +1,36 @@
+from typing import List, Union
 import numpy as np
 import hither2 as hi
 import kachery_p2p as kp
 import surfaceview2
 from ..backend import taskfunction
+from ._slice_encoding import _encode_slice_values
 from surfaceview2.config import job_cache, job_handler
 from surfaceview2.workspace_list import WorkspaceList
 
-@hi.function('get_vector_field_3d_slice_data', '0.1.3')
-def get_vector_field_3d_slice_data(vector_field_3d_uri: str, plane: str, slice_index: int):
+@hi.function('get_vector_field_3d_slice_data', '0.1.6')
+def get_vector_field_3d_slice_data(
+    vector_field_3d_uri: str, plane: str, slice_index: int, target_resolution: Union[int, None]=None,
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
     V = surfaceview2.VectorField3D(vector_field_3d_uri)
-    if plane == 'XY':
-        a = V.values[:, :, :, slice_index]
-    elif plane == 'XZ':
-        a = V.values[:, :, slice_index, :]
-    elif plane == 'YZ':
-        a = V.values[:, slice_index, :, :]
+    if target_resolution is not None:
+        # serve the coarsest pyramid level that meets the target resolution
+        level = V.select_level(plane, target_resolution)
     else:
-        raise Exception('Unexpected plane')
-    return {'values': np.stack((a.real.astype(np.float32), a.imag.astype(np.float32)))}
+        level = 0
+    a = V.get_level_slice(plane, slice_index, level)
+    ret = _encode_slice_values(a, components=components, quantity=quantity, precision=precision)
+    ret['level'] = level
+    return ret
 
-@taskfunction('get_vector_field_3d_slice_data.3')
-def task_get_vector_field_3d_slice_data(vector_field_3d_uri: str, plane: str, slice_index: int):
+@taskfunction('get_vector_field_3d_slice_data.3', result_encoding='binary', priority_class='interactive')
+def task_get_vector_field_3d_slice_data(
+    vector_field_3d_uri: str, plane: str, slice_index: int, target_resolution: Union[int, None]=None,
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
     with hi.Config(job_handler=job_handler.misc, job_cache=None):
-        return hi.Job(get_vector_field_3d_slice_data, {'vector_field_3d_uri': vector_field_3d_uri, 'plane': plane, 'slice_index': slice_index})
\ No newline at end of file
+        return hi.Job(get_vector_field_3d_slice_data, {
+            'vector_field_3d_uri': vector_field_3d_uri, 'plane': plane, 'slice_index': slice_index, 'target_resolution': target_resolution,
+            'components': components, 'quantity': quantity, 'precision': precision
+        })
\ No newline at end of file
@@ -0,0 +1,64 @@
+from typing import List, Tuple, Union
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from ._slice_encoding import _encode_slice_values
+from surfaceview2.config import job_cache, job_handler
+
+# bound on the total number of grid samples over all queries (each slab is assembled in memory)
+max_slices_num_samples = 8 * 1024 * 1024
+
+@hi.function('get_vector_field_3d_slices_data', '0.1.2')
+def get_vector_field_3d_slices_data(vector_field_3d_uri: str, queries: List[dict], components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'):
+    # each query is {'plane': 'XY' | 'XZ' | 'YZ', 'slice_index_range': [start, end]} (end exclusive)
+    V = surfaceview2.VectorField3D(vector_field_3d_uri)
+    _check_queries(queries, (V.nx, V.ny, V.nz))
+    ret = []
+    for q in queries:
+        plane = q['plane']
+        i1, i2 = q['slice_index_range']
+        # read the whole slab once, then put the slice axis first: component x slice x n1 x n2
+        if plane == 'XY':
+            a = V.get_subvolume((0, V.nx), (0, V.ny), (i1, i2)).transpose(0, 3, 1, 2)
+        elif plane == 'XZ':
+            a = V.get_subvolume((0, V.nx), (i1, i2), (0, V.nz)).transpose(0, 2, 1, 3)
+        else:
+            a = V.get_subvolume((i1, i2), (0, V.ny), (0, V.nz))
+        # for quantity='complex' the values are real/imag x component x slice x n1 x n2
+        x = _encode_slice_values(a, components=components, quantity=quantity, precision=precision)
+        ret.append({
+            'plane': plane,
+            'sliceIndexRange': [i1, i2],
+            **x
+        })
+    return {'slices': ret}
+
+@taskfunction('get_vector_field_3d_slices_data.1', result_encoding='binary', priority_class='interactive')
+def task_get_vector_field_3d_slices_data(vector_field_3d_uri: str, queries: List[dict], components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'):
+    # reject oversized requests before a worker is used, if the descriptor records the grid size
+    data = surfaceview2.VectorField3D(vector_field_3d_uri).serialize().get('data', {})
+    if all([k in data for k in ['nx', 'ny', 'nz']]):
+        _check_queries(queries, (int(data['nx']), int(data['ny']), int(data['nz'])))
+    with hi.Config(job_handler=job_handler.misc, job_cache=None):
+        return hi.Job(get_vector_field_3d_slices_data, {'vector_field_3d_uri': vector_field_3d_uri, 'queries': queries, 'components': components, 'quantity': quantity, 'precision': precision})
+
+def _check_queries(queries: List[dict], shape: Tuple[int, int, int]):
+    nx, ny, nz = shape
+    num_samples = 0
+    for q in queries:
+        plane = q['plane']
+        i1, i2 = q['slice_index_range']
+        if plane == 'XY':
+            n, slice_size = nz, nx * ny
+        elif plane == 'XZ':
+            n, slice_size = ny, nx * nz
+        elif plane == 'YZ':
+            n, slice_size = nx, ny * nz
+        else:
+            raise Exception(f'Unexpected plane: {plane}')
+        if (i1 < 0) or (i2 > n) or (i1 >= i2):
+            raise Exception(f'Invalid slice index range: [{i1}, {i2}) (size {n})')
+        num_samples = num_samples + (i2 - i1) * slice_size
+    if num_samples > max_slices_num_samples:
+        raise Exception(f'Too many samples requested: {num_samples} (at most {max_slices_num_samples})')
@@ -0,0 +1,25 @@
+from typing import List
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from surfaceview2.config import job_cache, job_handler
+
+@hi.function('pick_surface_faces', '0.1.0')
+def pick_surface_faces(surface_uri: str, origins: List[List[float]], directions: List[List[float]]):
+    S = surfaceview2.Surface(surface_uri)
+    origins0 = np.array(origins, dtype=np.float64).reshape((-1, 3))
+    directions0 = np.array(directions, dtype=np.float64).reshape((-1, 3))
+    x = S.pick(origins0, directions0)
+    hit = x['face_indices'] >= 0
+    points = origins0 + directions0 * np.where(hit, x['t'], 0)[:, None]
+    return {
+        'faceIndices': x['face_indices'].astype(np.int32),
+        'distances': np.where(hit, x['t'], -1).astype(np.float32), # along the ray, in units of the direction vector
+        'points': points.astype(np.float32)
+    }
+
+@taskfunction('pick_surface_faces.1', priority_class='interactive')
+def task_pick_surface_faces(surface_uri: str, origins: List[List[float]], directions: List[List[float]]):
+    with hi.Config(job_handler=job_handler.misc, job_cache=None):
+        return hi.Job(pick_surface_faces, {'surface_uri': surface_uri, 'origins': origins, 'directions': directions})
@@ -0,0 +1,27 @@
+from typing import List, Union
+import numpy as np
+import hither2 as hi
+import surfaceview2
+from ..backend import taskfunction
+from ._slice_encoding import _encode_slice_values
+from surfaceview2.config import job_cache, job_handler
+
+@hi.function('probe_vector_field_3d', '0.1.1')
+def probe_vector_field_3d(
+    vector_field_3d_uri: str, points: List[List[float]],
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
+    V = surfaceview2.VectorField3D(vector_field_3d_uri)
+    a = V.probe(np.array(points, dtype=np.float64).reshape((-1, 3))) # dim x m, nan outside the grid
+    return _encode_slice_values(a, components=components, quantity=quantity, precision=precision)
+
+@taskfunction('probe_vector_field_3d.1', priority_class='interactive')
+def task_probe_vector_field_3d(
+    vector_field_3d_uri: str, points: List[List[float]],
+    components: Union[List[int], None]=None, quantity: str='complex', precision: str='float32'
+):
+    with hi.Config(job_handler=job_handler.misc, job_cache=None):
+        return hi.Job(probe_vector_field_3d, {
+            'vector_field_3d_uri': vector_field_3d_uri, 'points': points,
+            'components': components, 'quantity': quantity, 'precision': precision
+        })
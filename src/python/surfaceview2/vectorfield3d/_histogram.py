@@ -0,0 +1,83 @@
+from typing import List, Union
+
+import numpy as np
+
+from ._stats import _max_or_none, _min_or_none
+
+def _quantity_values(values: np.ndarray, quantity: str, component: Union[int, None]) -> np.ndarray:
+    # values: dim x ... -> the requested real-valued quantity (all components pooled unless one is selected)
+    if quantity == 'magnitude' and component is None:
+        return np.sqrt(np.sum(np.abs(values) ** 2, axis=0))
+    a = values if component is None else values[component]
+    if quantity == 'real':
+        return np.real(a)
+    elif quantity == 'imag':
+        return np.imag(a)
+    elif quantity == 'magnitude':
+        return np.abs(a)
+    else:
+        raise Exception(f'Unexpected quantity: {quantity}')
+
+def _value_range_from_stats(stats: Union[dict, None], quantity: str, component: Union[int, None]):
+    r = _value_range_from_stats_0(stats, quantity, component)
+    if (r is None) or (r[0] is None) or (r[1] is None):
+        # not covered by the stats, or no finite values
+        return None
+    return r
+
+def _value_range_from_stats_0(stats: Union[dict, None], quantity: str, component: Union[int, None]):
+    if stats is None:
+        return None
+    if component is None:
+        if quantity == 'magnitude':
+            return stats['magnitude_min'], stats['magnitude_max']
+        c = stats['components']
+        if quantity == 'real':
+            return _min_or_none([x['real_min'] for x in c]), _max_or_none([x['real_max'] for x in c])
+        elif quantity == 'imag':
+            return _min_or_none([x['imag_min'] for x in c]), _max_or_none([x['imag_max'] for x in c])
+    elif quantity in ['real', 'imag']:
+        x = stats['components'][component]
+        return x[f'{quantity}_min'], x[f'{quantity}_max']
+    return None
+
+def _iter_slabs(V, slab_size: int):
+    for x0 in range(0, V.nx, slab_size):
+        yield V.get_subvolume((x0, min(x0 + slab_size, V.nx)), (0, V.ny), (0, V.nz))
+
+def _streaming_histogram(V, *, quantity: str, component: Union[int, None], num_bins: int, percentiles: List[float], slab_size: int=16, refinement: int=64) -> dict:
+    # two passes over x-slabs in bounded memory: value range (skipped if precomputed stats cover it),
+    # then a fine histogram from which both the output histogram and the percentiles are derived
+    data = V.serialize().get('data', {})
+    r = _value_range_from_stats(data.get('stats', None), quantity, component)
+    if r is None:
+        vmin, vmax = np.inf, -np.inf
+        for values in _iter_slabs(V, slab_size):
+            a = _quantity_values(values, quantity, component)
+            a = a[np.isfinite(a)]
+            if a.size > 0:
+                vmin = min(vmin, float(np.min(a)))
+                vmax = max(vmax, float(np.max(a)))
+        if vmin > vmax:
+            # no finite values
+            vmin, vmax = 0.0, 0.0
+    else:
+        vmin, vmax = r
+    if not vmax > vmin:
+        vmax = vmin + 1
+    fine_counts = np.zeros(num_bins * refinement, dtype=np.int64)
+    for values in _iter_slabs(V, slab_size):
+        a = _quantity_values(values, quantity, component)
+        c, _ = np.histogram(a[np.isfinite(a)], bins=len(fine_counts), range=(vmin, vmax))
+        fine_counts += c
+    fine_edges = np.linspace(vmin, vmax, len(fine_counts) + 1)
+    cdf = np.concatenate(([0], np.cumsum(fine_counts))) / max(int(np.sum(fine_counts)), 1)
+    # approximate percentiles by linear interpolation of the cumulative distribution
+    percentile_values = np.interp(np.array(percentiles, dtype=np.float64) / 100, cdf, fine_edges)
+    return {
+        'min': vmin,
+        'max': vmax,
+        'bin_edges': fine_edges[::refinement],
+        'counts': fine_counts.reshape((num_bins, refinement)).sum(axis=1),
+        'percentiles': percentile_values
+    }
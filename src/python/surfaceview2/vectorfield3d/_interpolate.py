@@ -0,0 +1,40 @@
+import numpy as np
+
+def _axis_weights(grid: np.ndarray, p: np.ndarray):
+    # lower index, upper index and fractional weight of p along an increasing grid
+    # inside is False for points outside the grid range
+    n = len(grid)
+    if n == 1:
+        zero = np.zeros(len(p), dtype=np.int64)
+        return zero, zero, np.zeros(len(p)), p == grid[0]
+    i0 = np.clip(np.searchsorted(grid, p, side='right') - 1, 0, n - 2)
+    g0 = grid[i0]
+    g1 = grid[i0 + 1]
+    frac = np.clip((p - g0) / (g1 - g0), 0, 1)
+    inside = (p >= grid[0]) & (p <= grid[-1])
+    return i0, i0 + 1, frac, inside
+
+def _trilinear(V, points: np.ndarray, *, chunk_size: int=100000) -> np.ndarray:
+    # trilinear interpolation of a VectorField3D at points (m x 3)
+    # returns dim x m (complex), nan for points outside the grid
+    xgrid, ygrid, zgrid = [np.asarray(g, dtype=np.float64) for g in (V.xgrid, V.ygrid, V.zgrid)]
+    m = points.shape[0]
+    ret = np.full((V.dim, m), np.nan, dtype=np.complex128)
+    for i in range(0, m, chunk_size):
+        p = points[i:i + chunk_size]
+        x0, x1, fx, inx = _axis_weights(xgrid, p[:, 0])
+        y0, y1, fy, iny = _axis_weights(ygrid, p[:, 1])
+        z0, z1, fz, inz = _axis_weights(zgrid, p[:, 2])
+        # gather the 8 corners with a single lookup
+        ix = np.concatenate([x0, x0, x0, x0, x1, x1, x1, x1])
+        iy = np.concatenate([y0, y0, y1, y1, y0, y0, y1, y1])
+        iz = np.concatenate([z0, z1, z0, z1, z0, z1, z0, z1])
+        c = V.get_values_at_indices(ix, iy, iz).reshape((V.dim, 8, len(p)))
+        w = np.stack([
+            (1 - fx) * (1 - fy) * (1 - fz), (1 - fx) * (1 - fy) * fz, (1 - fx) * fy * (1 - fz), (1 - fx) * fy * fz,
+            fx * (1 - fy) * (1 - fz), fx * (1 - fy) * fz, fx * fy * (1 - fz), fx * fy * fz
+        ])
+        a = np.sum(c * w[None, :, :], axis=1)
+        a[:, ~(inx & iny & inz)] = np.nan
+        ret[:, i:i + chunk_size] = a
+    return ret
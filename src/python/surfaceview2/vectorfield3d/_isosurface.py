@@ -0,0 +1,154 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+
+import numpy as np
+
+# Isosurface extraction by marching tetrahedra: each grid cell is split into the six
+# tetrahedra around its main diagonal (the same split in every cell, so the result is
+# crack free), and each tetrahedron contributes at most two triangles.
+
+# cell corner c is at offset (c & 1, (c >> 1) & 1, (c >> 2) & 1)
+_TETRAHEDRA = [(0, 1, 3, 7), (0, 3, 2, 7), (0, 2, 6, 7), (0, 6, 4, 7), (0, 4, 5, 7), (0, 5, 1, 7)]
+
+def _tetrahedron_cases():
+    # for each of the 16 inside/outside cases: a list of triangles, each given by three tetrahedron edges
+    ret = []
+    for case in range(16):
+        ins = [i for i in range(4) if (case >> i) & 1]
+        outs = [i for i in range(4) if not (case >> i) & 1]
+        if len(ins) == 1:
+            ret.append([[(ins[0], o) for o in outs]])
+        elif len(ins) == 3:
+            ret.append([[(i, outs[0]) for i in ins]])
+        elif len(ins) == 2:
+            (i, j), (k, l) = ins, outs
+            ret.append([[(i, k), (i, l), (j, l)], [(i, k), (j, l), (j, k)]])
+        else:
+            ret.append([])
+    return ret
+
+_CASES = _tetrahedron_cases()
+
+def _scalar_field(values: np.ndarray, quantity: str, component: Union[int, None]) -> np.ndarray:
+    if component is None:
+        if quantity != 'magnitude':
+            raise Exception(f'A component is required for quantity: {quantity}')
+        return np.sqrt(np.sum(np.abs(values) ** 2, axis=0))
+    a = values[component]
+    if quantity == 'magnitude':
+        return np.abs(a)
+    elif quantity == 'real':
+        return np.real(a)
+    elif quantity == 'imag':
+        return np.imag(a)
+    else:
+        raise Exception(f'Unexpected quantity: {quantity}')
+
+def _march_slab(f: np.ndarray, x_offset: int, grids, shape, threshold: float):
+    # f: scalar values on grid points [x_offset, x_offset + f.shape[0]) x ny x nz
+    # returns (edge keys per triangle corner (m x 3), unique edge keys, vertex positions for those keys)
+    nx, ny, nz = shape
+    N = nx * ny * nz
+    cx, cy, cz = f.shape[0] - 1, f.shape[1] - 1, f.shape[2] - 1
+    if cx < 1 or cy < 1 or cz < 1:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros((0,), dtype=np.int64), np.zeros((0, 3))
+    corner_offsets = [(c & 1, (c >> 1) & 1, (c >> 2) & 1) for c in range(8)]
+    # only the cells whose corners are not all on the same side of the threshold contain
+    # part of the surface; find those first (one byte per cell) and gather the corner
+    # values and keys for those cells only
+    inside = f > threshold
+    any_inside = np.zeros((cx, cy, cz), dtype=bool)
+    all_inside = np.ones((cx, cy, cz), dtype=bool)
+    for (dx, dy, dz) in corner_offsets:
+        corner = inside[dx:dx + cx, dy:dy + cy, dz:dz + cz]
+        any_inside |= corner
+        all_inside &= corner
+    # grid point indices (local) of the origins of the crossing cells
+    ix, iy, iz = np.unravel_index(np.flatnonzero(any_inside & ~all_inside), (cx, cy, cz))
+    del inside, any_inside, all_inside
+    corner_values = [f[ix + dx, iy + dy, iz + dz] for (dx, dy, dz) in corner_offsets]
+    corner_global = [((ix + dx + x_offset) * ny + (iy + dy)) * nz + (iz + dz) for (dx, dy, dz) in corner_offsets]
+    corner_inside = [v > threshold for v in corner_values]
+    keys_list = []
+    ga_list = []
+    gb_list = []
+    fa_list = []
+    fb_list = []
+    for tet in _TETRAHEDRA:
+        case = corner_inside[tet[0]].astype(np.int64) | (corner_inside[tet[1]].astype(np.int64) << 1) | \
+            (corner_inside[tet[2]].astype(np.int64) << 2) | (corner_inside[tet[3]].astype(np.int64) << 3)
+        for c in range(1, 15):
+            cells = np.flatnonzero(case == c)
+            if len(cells) == 0:
+                continue
+            for tri in _CASES[c]:
+                corner_keys = []
+                for (a, b) in tri:
+                    # the edge from inside (a) to outside (b), keyed by its unordered grid point pair
+                    ga = corner_global[tet[a]][cells]
+                    gb = corner_global[tet[b]][cells]
+                    corner_keys.append(np.minimum(ga, gb) * N + np.maximum(ga, gb))
+                    ga_list.append(ga)
+                    gb_list.append(gb)
+                    fa_list.append(corner_values[tet[a]][cells])
+                    fb_list.append(corner_values[tet[b]][cells])
+                keys_list.append(np.stack(corner_keys, axis=1))
+    if len(keys_list) == 0:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros((0,), dtype=np.int64), np.zeros((0, 3))
+    # per-corner arrays are stored block by block: all corner 0 rows, then corner 1, then corner 2
+    fa = np.concatenate(fa_list).astype(np.float64)
+    fb = np.concatenate(fb_list).astype(np.float64)
+    t = np.clip((threshold - fa) / np.where(fb != fa, fb - fa, 1), 0, 1)
+    pa = _grid_positions(np.concatenate(ga_list), grids, shape)
+    pb = _grid_positions(np.concatenate(gb_list), grids, shape)
+    positions = pa + t[:, None] * (pb - pa)
+    # orient each triangle so that its normal points from inside (above the threshold) to outside
+    keys = np.concatenate(keys_list)
+    corner_positions = _reshape_corners(positions, keys_list)
+    inside_to_outside = _reshape_corners(pb - pa, keys_list)[:, 0, :]
+    normal = np.cross(corner_positions[:, 1] - corner_positions[:, 0], corner_positions[:, 2] - corner_positions[:, 0])
+    flip = np.sum(normal * inside_to_outside, axis=1) < 0
+    keys[flip] = keys[flip][:, [0, 2, 1]]
+    unique_keys, first = np.unique(_flatten_corner_keys(keys_list), return_index=True)
+    return keys, unique_keys, positions[first]
+
+def _reshape_corners(x: np.ndarray, keys_list) -> np.ndarray:
+    # per-corner rows (block by block) -> num_triangles x 3 x ...
+    ret = []
+    i = 0
+    for k in keys_list:
+        m = len(k)
+        ret.append(np.stack([x[i:i + m], x[i + m:i + 2 * m], x[i + 2 * m:i + 3 * m]], axis=1))
+        i = i + 3 * m
+    return np.concatenate(ret)
+
+def _flatten_corner_keys(keys_list) -> np.ndarray:
+    # edge keys in the same row order as the per-corner arrays
+    return np.concatenate([k.T.ravel() for k in keys_list])
+
+def _grid_positions(g: np.ndarray, grids, shape) -> np.ndarray:
+    nx, ny, nz = shape
+    xgrid, ygrid, zgrid = grids
+    return np.stack((xgrid[g // (ny * nz)], ygrid[(g // nz) % ny], zgrid[g % nz]), axis=1)
+
+def _extract_isosurface(V, *, threshold: float, quantity: str='magnitude', component: Union[int, None]=None, slab_size: int=32, num_workers: int=4):
+    # returns (vertices: n x 3 float32, triangles: m x 3 int32)
+    shape = (V.nx, V.ny, V.nz)
+    grids = tuple(np.asarray(g, dtype=np.float64) for g in (V.xgrid, V.ygrid, V.zgrid))
+    def process_slab(x0: int):
+        # cells with x in [x0, x0 + slab_size) need grid points up to x0 + slab_size
+        x1 = min(x0 + slab_size + 1, V.nx)
+        values = V.get_subvolume((x0, x1), (0, V.ny), (0, V.nz))
+        return _march_slab(_scalar_field(values, quantity, component), x0, grids, shape, threshold)
+    slab_starts = list(range(0, max(V.nx - 1, 1), slab_size))
+    # NumPy releases the GIL in the heavy kernels, so slabs are processed concurrently in threads
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        results = list(executor.map(process_slab, slab_starts))
+    keys = np.concatenate([r[0] for r in results])
+    all_keys = np.concatenate([r[1] for r in results])
+    all_positions = np.concatenate([r[2] for r in results])
+    # merge the vertices shared between slabs
+    unique_keys, first = np.unique(all_keys, return_index=True)
+    vertices = all_positions[first]
+    triangles = np.searchsorted(unique_keys, keys)
+    return vertices.astype(np.float32), triangles.astype(np.int32)
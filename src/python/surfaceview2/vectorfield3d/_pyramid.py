@@ -0,0 +1,23 @@
+import numpy as np
+
+def _downsample2(x: np.ndarray, axis: int) -> np.ndarray:
+    # average adjacent pairs along an axis; an odd trailing sample is kept as is
+    n = x.shape[axis]
+    a = np.take(x, np.arange(0, n, 2), axis=axis)
+    b = np.take(x, np.arange(1, n, 2), axis=axis)
+    if b.shape[axis] < a.shape[axis]:
+        b = np.concatenate((b, np.take(a, [a.shape[axis] - 1], axis=axis)), axis=axis)
+    return (a + b) / 2
+
+def _downsample_volume(xgrid: np.ndarray, ygrid: np.ndarray, zgrid: np.ndarray, values: np.ndarray):
+    # 2x downsampling over (x, y, z); axes of length 1 are left alone
+    grids = [xgrid, ygrid, zgrid]
+    for i in range(3):
+        if len(grids[i]) > 1:
+            grids[i] = _downsample2(grids[i], axis=0).astype(grids[i].dtype)
+            values = _downsample2(values, axis=i + 1).astype(values.dtype)
+    return grids[0], grids[1], grids[2], values
+
+def _level_slice_index(slice_index: int, level: int, n: int) -> int:
+    # the slice of a coarser level that contains the given base-level slice
+    return min(slice_index >> level, n - 1)
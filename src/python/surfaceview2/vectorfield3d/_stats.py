@@ -0,0 +1,56 @@
+from typing import Tuple, Union
+
+import numpy as np
+
+def _compute_stats(values: np.ndarray, *, num_bins: int=64) -> dict:
+    # values: dim x nx x ny x nz (real or complex)
+    # non-finite values (e.g. masked samples) are left out; min/max are None and the histogram
+    # is None if no value is finite
+    components = []
+    sum_sqr = np.zeros(values.shape[1:], dtype=np.float64)
+    for c in range(values.shape[0]):
+        v = values[c]
+        re = np.real(v)
+        im = np.imag(v)
+        real_min, real_max = _finite_range(re)
+        imag_min, imag_max = _finite_range(im)
+        components.append({
+            'real_min': real_min,
+            'real_max': real_max,
+            'imag_min': imag_min,
+            'imag_max': imag_max
+        })
+        sum_sqr += re.astype(np.float64) ** 2 + im.astype(np.float64) ** 2
+    magnitude = np.sqrt(sum_sqr)
+    finite_magnitude = magnitude[np.isfinite(magnitude)]
+    magnitude_min, magnitude_max = _finite_range(finite_magnitude)
+    if magnitude_min is not None:
+        counts, bin_edges = np.histogram(finite_magnitude, bins=num_bins, range=(magnitude_min, magnitude_max))
+        magnitude_histogram: Union[dict, None] = {
+            'bin_edges': [float(a) for a in bin_edges],
+            'counts': [int(a) for a in counts]
+        }
+    else:
+        magnitude_histogram = None
+    return {
+        'components': components,
+        'real_min': _min_or_none([x['real_min'] for x in components]),
+        'real_max': _max_or_none([x['real_max'] for x in components]),
+        'magnitude_min': magnitude_min,
+        'magnitude_max': magnitude_max,
+        'magnitude_histogram': magnitude_histogram
+    }
+
+def _finite_range(a: np.ndarray) -> Tuple[Union[float, None], Union[float, None]]:
+    a = a[np.isfinite(a)]
+    if a.size == 0:
+        return None, None
+    return float(np.min(a)), float(np.max(a))
+
+def _min_or_none(x: list) -> Union[float, None]:
+    x = [a for a in x if a is not None]
+    return min(x) if len(x) > 0 else None
+
+def _max_or_none(x: list) -> Union[float, None]:
+    x = [a for a in x if a is not None]
+    return max(x) if len(x) > 0 else None
@@ -1,62 +1,272 @@
-from typing import Union, cast
+from typing import List, Tuple, Union, cast
 
 import kachery_p2p as kp
 import numpy as np
+from .._array_store import _load_json, _load_npy_mmap, _load_pkl, _store_npy
+from ._histogram import _streaming_histogram
+from ._interpolate import _trilinear
+from ._isosurface import _extract_isosurface
+from ._pyramid import _downsample_volume, _level_slice_index
+from ._stats import _compute_stats
 
 class VectorField3D:
     def __init__(self, arg: Union[dict, str]):
         if isinstance(arg, str):
-            x = kp.load_json(arg)
-            if not x:
-                raise Exception(f'Unable to load: {arg}')
-            arg = cast(dict, x)
-        self._load(arg)
+            arg = cast(dict, _load_json(arg))
         self._arg = arg
+        self._loaded = False # arrays are loaded on first access
     def serialize(self):
         return self._arg
     @property
     def xgrid(self) -> np.ndarray:
+        self._ensure_loaded()
         return self._xgrid
     @property
     def ygrid(self) -> np.ndarray:
+        self._ensure_loaded()
         return self._ygrid
     @property
     def zgrid(self) -> np.ndarray:
+        self._ensure_loaded()
         return self._zgrid
     @property
+    def nx(self) -> int:
+        return self._get_size('nx', 1)
+    @property
+    def ny(self) -> int:
+        return self._get_size('ny', 2)
+    @property
+    def nz(self) -> int:
+        return self._get_size('nz', 3)
+    @property
     def dim(self) -> int:
-        return self._values.shape[0]
+        return self._get_size('dim', 0)
+    @property
+    def stats(self) -> dict:
+        # summary statistics, precomputed in from_numpy (see backfill_stats for older fields)
+        data = self._arg.get('data', {})
+        if 'stats' in data:
+            return data['stats']
+        return _compute_stats(self.values)
     @property
     def values(self) -> np.ndarray:
+        self._ensure_loaded()
+        if self._values is None:
+            # chunked format: assemble the full volume from the bricks
+            self._values = self.get_subvolume((0, self.nx), (0, self.ny), (0, self.nz))
         return self._values
+    def get_slice(self, plane: str, slice_index: int) -> np.ndarray:
+        # returns dim x n1 x n2, only reading the bricks that cross the plane
+        if plane == 'XY':
+            _check_index(slice_index, self.nz)
+            return self.get_subvolume((0, self.nx), (0, self.ny), (slice_index, slice_index + 1))[:, :, :, 0]
+        elif plane == 'XZ':
+            _check_index(slice_index, self.ny)
+            return self.get_subvolume((0, self.nx), (slice_index, slice_index + 1), (0, self.nz))[:, :, 0, :]
+        elif plane == 'YZ':
+            _check_index(slice_index, self.nx)
+            return self.get_subvolume((slice_index, slice_index + 1), (0, self.ny), (0, self.nz))[:, 0, :, :]
+        else:
+            raise Exception(f'Unexpected plane: {plane}')
+    @property
+    def num_levels(self) -> int:
+        # number of resolution levels, including the base level
+        return 1 + len(self._arg.get('data', {}).get('pyramid', []))
+    def get_level(self, level: int):
+        # level 0 is the base data, level L is downsampled by 2^L
+        if level == 0:
+            return self
+        pyramid = self._arg.get('data', {}).get('pyramid', [])
+        if (level < 0) or (level > len(pyramid)):
+            raise Exception(f'Level out of range: {level}')
+        return VectorField3D(pyramid[level - 1])
+    def select_level(self, plane: str, target_resolution: int) -> int:
+        # the coarsest level whose slices in this plane are at least target_resolution in each direction
+        ret = 0
+        for level in range(1, self.num_levels):
+            L = self.get_level(level)
+            if plane == 'XY':
+                shape = (L.nx, L.ny)
+            elif plane == 'XZ':
+                shape = (L.nx, L.nz)
+            elif plane == 'YZ':
+                shape = (L.ny, L.nz)
+            else:
+                raise Exception(f'Unexpected plane: {plane}')
+            if min(shape) < target_resolution:
+                break
+            ret = level
+        return ret
+    def get_level_slice(self, plane: str, slice_index: int, level: int) -> np.ndarray:
+        # slice_index refers to the base level
+        if plane not in ['XY', 'XZ', 'YZ']:
+            raise Exception(f'Unexpected plane: {plane}')
+        # validate against the base level (the mapping to a coarser level clamps to its last slice)
+        _check_index(slice_index, {'XY': self.nz, 'XZ': self.ny, 'YZ': self.nx}[plane])
+        L = self.get_level(level)
+        n = {'XY': L.nz, 'XZ': L.ny, 'YZ': L.nx}[plane]
+        return L.get_slice(plane, _level_slice_index(slice_index, level, n))
+    def extract_isosurface(self, threshold: float, *, quantity: str='magnitude', component: Union[int, None]=None, surface_format: str='npy_v1', num_workers: int=4):
+        # isosurface of |V| (component=None) or of the magnitude/real/imag part of one component
+        from ..surface import Surface
+        vertices, triangles = _extract_isosurface(self, threshold=threshold, quantity=quantity, component=component, num_workers=num_workers)
+        return Surface.from_numpy(
+            vertices=vertices,
+            faces=triangles.ravel(),
+            ifaces=np.arange(0, 3 * len(triangles), 3, dtype=np.int32),
+            surface_format=surface_format
+        )
+    def get_histogram(self, *, quantity: str='real', component: Union[int, None]=None, num_bins: int=256, percentiles: Union[List[float], None]=None) -> dict:
+        # histogram and approximate percentiles of real/imag/magnitude values, streamed over the volume
+        if percentiles is None:
+            percentiles = [1, 5, 50, 95, 99]
+        return _streaming_histogram(self, quantity=quantity, component=component, num_bins=num_bins, percentiles=percentiles)
+    def probe(self, points: np.ndarray, *, chunk_size: int=100000) -> np.ndarray:
+        # trilinear interpolation at points (m x 3), returns dim x m (nan outside the grid)
+        return _trilinear(self, np.asarray(points, dtype=np.float64).reshape((-1, 3)), chunk_size=chunk_size)
+    def get_oblique_slice(self, origin: np.ndarray, axis1: np.ndarray, axis2: np.ndarray, n1: int, n2: int) -> np.ndarray:
+        # resample the plane origin + s * axis1 + t * axis2 (s, t in [0, 1]) on an n1 x n2 grid
+        # returns dim x n1 x n2 (nan outside the grid); only bricks crossed by the plane are read
+        s = np.linspace(0, 1, n1) if n1 > 1 else np.zeros((1,))
+        t = np.linspace(0, 1, n2) if n2 > 1 else np.zeros((1,))
+        S, T = np.meshgrid(s, t, indexing='ij')
+        points = np.asarray(origin, dtype=np.float64)[None, :] + S.ravel()[:, None] * np.asarray(axis1, dtype=np.float64)[None, :] + T.ravel()[:, None] * np.asarray(axis2, dtype=np.float64)[None, :]
+        return self.probe(points).reshape((self.dim, n1, n2))
+    def get_values_at_indices(self, ix: np.ndarray, iy: np.ndarray, iz: np.ndarray) -> np.ndarray:
+        # values at grid indices, returns dim x m, only reading the bricks that contain the indices
+        self._ensure_loaded()
+        if self._brick_uris is None:
+            return self.values[:, ix, iy, iz]
+        bx, by, bz = self._brick_size
+        ix, iy, iz = [np.asarray(i, dtype=np.int64) for i in (ix, iy, iz)]
+        nby, nbz = len(self._brick_uris[0]), len(self._brick_uris[0][0])
+        # group the indices by brick with a single sort of the linear brick ids
+        brick_keys = ((ix // bx) * nby + (iy // by)) * nbz + (iz // bz)
+        order = np.argsort(brick_keys, kind='stable')
+        sorted_keys = brick_keys[order]
+        groups = np.split(order, np.flatnonzero(np.diff(sorted_keys)) + 1) if len(order) > 0 else []
+        ret = np.zeros((self.dim, len(ix)), dtype=self._arg['data']['dtype'])
+        for inds in groups:
+            k = int(brick_keys[inds[0]])
+            a, b, c = k // (nby * nbz), (k // nbz) % nby, k % nbz
+            brick = _load_npy_mmap(self._brick_uris[a][b][c])
+            ret[:, inds] = brick[:, ix[inds] - a * bx, iy[inds] - b * by, iz[inds] - c * bz]
+        return ret
+    def get_subvolume(self, x_range: Tuple[int, int], y_range: Tuple[int, int], z_range: Tuple[int, int]) -> np.ndarray:
+        # returns dim x (x1 - x0) x (y1 - y0) x (z1 - z0)
+        self._ensure_loaded()
+        (x0, x1), (y0, y1), (z0, z1) = x_range, y_range, z_range
+        if self._brick_uris is None:
+            return self.values[:, x0:x1, y0:y1, z0:z1]
+        bx, by, bz = self._brick_size
+        ret = np.zeros((self.dim, x1 - x0, y1 - y0, z1 - z0), dtype=self._arg['data']['dtype'])
+        for ix in range(x0 // bx, (x1 - 1) // bx + 1):
+            for iy in range(y0 // by, (y1 - 1) // by + 1):
+                for iz in range(z0 // bz, (z1 - 1) // bz + 1):
+                    brick = _load_npy_mmap(self._brick_uris[ix][iy][iz])
+                    # intersection of the brick with the requested region, in volume coordinates
+                    a0, a1 = max(x0, ix * bx), min(x1, (ix + 1) * bx)
+                    b0, b1 = max(y0, iy * by), min(y1, (iy + 1) * by)
+                    c0, c1 = max(z0, iz * bz), min(z1, (iz + 1) * bz)
+                    ret[:, a0 - x0:a1 - x0, b0 - y0:b1 - y0, c0 - z0:c1 - z0] = \
+                        brick[:, a0 - ix * bx:a1 - ix * bx, b0 - iy * by:b1 - iy * by, c0 - iz * bz:c1 - iz * bz]
+        return ret
+    def _get_size(self, key: str, axis: int) -> int:
+        # prefer the metadata in the descriptor so that the arrays do not need to be loaded
+        data = self._arg.get('data', {})
+        if key in data:
+            return int(data[key])
+        return self.values.shape[axis]
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._load(self._arg)
+            self._loaded = True
     def _load(self, arg: dict):
         format = arg.get('vectorfield3d_format')
         data = arg.get('data', {})
         if format == 'pkl_v1':
-            pkl_uri = data['pkl_uri']
-            x = kp.load_pkl(pkl_uri)
-            if x is None:
-                raise Exception(f'Unable to load: {pkl_uri}')
+            x = _load_pkl(data['pkl_uri'])
             self._xgrid = x['xgrid']
             self._ygrid = x['ygrid']
             self._zgrid = x['zgrid']
             self._values = x['values']
+            self._brick_uris = None
+        elif format == 'chunked_v1':
+            self._xgrid = np.array(_load_npy_mmap(data['xgrid_uri']))
+            self._ygrid = np.array(_load_npy_mmap(data['ygrid_uri']))
+            self._zgrid = np.array(_load_npy_mmap(data['zgrid_uri']))
+            manifest = _load_json(data['manifest_uri'])
+            self._brick_size = tuple(data['brick_size'])
+            self._brick_uris = manifest['bricks'] # indexed by [ix][iy][iz]
+            self._values = None
         else:
             raise Exception(f'Unexpected vector3d format: {format}')
     @staticmethod
-    def from_numpy(*, xgrid: np.ndarray, ygrid: np.ndarray, zgrid: np.ndarray, values: np.ndarray):
+    def from_numpy(*, xgrid: np.ndarray, ygrid: np.ndarray, zgrid: np.ndarray, values: np.ndarray, vectorfield3d_format: str='chunked_v1', brick_size: int=64, num_pyramid_levels: int=0):
         assert values.ndim == 4
         assert values.shape[1] == len(xgrid)
         assert values.shape[2] == len(ygrid)
         assert values.shape[3] == len(zgrid)
+        data = {
+            'dim': values.shape[0],
+            'nx': values.shape[1],
+            'ny': values.shape[2],
+            'nz': values.shape[3],
+            'stats': _compute_stats(values)
+        }
+        if vectorfield3d_format == 'pkl_v1':
+            data['pkl_uri'] = kp.store_pkl({
+                'xgrid': xgrid,
+                'ygrid': ygrid,
+                'zgrid': zgrid,
+                'values': values
+            })
+        elif vectorfield3d_format == 'chunked_v1':
+            # fixed-size bricks over (x, y, z), each stored as a separate .npy file,
+            # plus a manifest of brick URIs
+            bricks = [
+                [
+                    [
+                        _store_npy(values[:, x0:x0 + brick_size, y0:y0 + brick_size, z0:z0 + brick_size])
+                        for z0 in range(0, values.shape[3], brick_size)
+                    ]
+                    for y0 in range(0, values.shape[2], brick_size)
+                ]
+                for x0 in range(0, values.shape[1], brick_size)
+            ]
+            data['dtype'] = str(values.dtype)
+            data['brick_size'] = [brick_size, brick_size, brick_size]
+            data['xgrid_uri'] = _store_npy(xgrid)
+            data['ygrid_uri'] = _store_npy(ygrid)
+            data['zgrid_uri'] = _store_npy(zgrid)
+            data['manifest_uri'] = kp.store_json({'bricks': bricks})
+        else:
+            raise Exception(f'Unexpected vector3d format: {vectorfield3d_format}')
+        if num_pyramid_levels > 0:
+            # level-of-detail pyramid of 2x-downsampled volumes, stored in the same format
+            pyramid = []
+            x, y, z, v = xgrid, ygrid, zgrid, values
+            for _ in range(num_pyramid_levels):
+                if max(v.shape[1:]) <= 1:
+                    break
+                x, y, z, v = _downsample_volume(x, y, z, v)
+                pyramid.append(VectorField3D.from_numpy(xgrid=x, ygrid=y, zgrid=z, values=v, vectorfield3d_format=vectorfield3d_format, brick_size=brick_size).serialize())
+            data['pyramid'] = pyramid
         return VectorField3D({
-            'vectorfield3d_format': 'pkl_v1',
-            'data': {
-                'pkl_uri': kp.store_pkl({
-                    'xgrid': xgrid,
-                    'ygrid': ygrid,
-                    'zgrid': zgrid,
-                    'values': values
-                })
-            }
-        })
\ No newline at end of file
+            'vectorfield3d_format': vectorfield3d_format,
+            'data': data
+        })
+    def backfill_stats(self):
+        # for fields created before statistics were stored in the descriptor
+        # returns a new VectorField3D referencing the same data
+        data = self._arg.get('data', {})
+        if 'stats' in data:
+            return self
+        data = {**data}
+        data['dim'], data['nx'], data['ny'], data['nz'] = self.values.shape
+        data['stats'] = _compute_stats(self.values)
+        return VectorField3D({**self._arg, 'data': data})
+
+def _check_index(i: int, n: int):
+    if (i < 0) or (i >= n):
+        raise Exception(f'Slice index out of range: {i} (size {n})')
\ No newline at end of file